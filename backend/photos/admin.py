@@ -3,11 +3,42 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from adminsortable2.admin import SortableAdminMixin, SortableTabularInline, SortableAdminBase
-from .models import Category, CategoryCover, Album, Photo
-from django.urls import path
+from .models import Category, CategoryCover, Album, Photo, ImageJob
+from .caching import bump, invalidate_albums
+from .jobs import queue_stats
+from .ordering import move_photo, reorder_photos
+from .pagination import EstimatedCountPaginator
+from .resizing import resized_url
+from .services import upload_photos
+from django.db.models import Count, OuterRef, Subquery
+from django.urls import path, reverse
+from django.utils.http import urlencode
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.conf import settings
 
+# Admin previews use on-demand resized copies (photos.resizing), never the original
+THUMB_SIZE = (112, 112)     # w-14 / w-16 avatars at 2x
+GRID_SIZE = (480, 480)      # album photo grid
+PREVIEW_SIZE = (800, 800)   # "Preview mare" on change forms, grid lightbox
+
+# The album change view embeds this many photos; the grid fetches the rest as it scrolls
+PHOTO_PAGE_SIZE = 60
+PHOTO_PAGE_MAX = 200
+
+def grid_entry(photo_id, image, order, is_featured, caption):
+    """A photo as the album change view grid (change_form.html) expects it"""
+    return {
+        "id": photo_id,
+        "url": resized_url(image, GRID_SIZE),
+        "preview": resized_url(image, PREVIEW_SIZE),
+        "order": order,
+        "is_featured": is_featured,
+        "caption": caption,
+    }
+
+
 def thumbnail(url, size=14):
     if not url:
         return mark_safe(
@@ -21,6 +52,13 @@ def thumbnail(url, size=14):
         size, size, url,
     )
 
+STATUS_BADGES = {
+    Photo.ProcessingStatus.PENDING: "badge-ghost",
+    Photo.ProcessingStatus.PROCESSING: "badge-info",
+    Photo.ProcessingStatus.READY: "badge-success",
+    Photo.ProcessingStatus.FAILED: "badge-error",
+}
+
 def badge(label, css_class="badge-ghost", icon=None):
     icon_html = f'<i class="fa-solid fa-{icon} text-xs"></i>' if icon else ""
     return mark_safe(
@@ -28,6 +66,98 @@ def badge(label, css_class="badge-ghost", icon=None):
     )
 
 
+class LargeChangelistMixin:
+    """
+    Changelists that stay fast as the table grows: estimated counts past a
+    threshold, key-first page fetches (see EstimatedCountPaginator) and no
+    unfiltered "N total" count next to the filtered one.
+    """
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # Only the changelist; adminsortable2's bulk moves keep the exact `self.paginator`
+        paginator = EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        # adminsortable2 paginates the same queryset on every get_actions() call: count it once per request
+        counts = request.__dict__.setdefault("_changelist_counts", {})
+        key = str(queryset.query)
+        if key not in counts:
+            counts[key] = paginator.count
+        paginator.count = counts[key]
+        return paginator
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign key filter that searches the related model's admin (its
+    search_fields) through the admin autocomplete view, instead of listing
+    every related row in the sidebar.
+    """
+    template = "admin/photos/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        value = params.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+        self.autocomplete_url = reverse(f"{model_admin.admin_site.name}:autocomplete") + "?" + urlencode({
+            "app_label": field.model._meta.app_label,
+            "model_name": field.model._meta.model_name,
+            "field_name": field.name,
+        })
+        self.selected = None
+        if self.lookup_val:
+            related = field.related_model._default_manager.filter(pk=self.lookup_val)
+            self.selected = self.select_selected(related).first()
+
+    def select_selected(self, queryset):
+        """Hook to join what the related model's __str__ needs"""
+        return queryset
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": "Toate",
+        }
+
+
+class AlbumAutocompleteFilter(AutocompleteFilter):
+    def select_selected(self, queryset):
+        # Album.__str__ shows the category
+        return queryset.select_related("category")
+
+
+class CatalogueSortMixin:
+    """
+    adminsortable2 reorders with bulk_update / F() updates, which skip the
+    signals that keep Category.cover_path and the API cache in sync;
+    after each move, refresh_sorted() refreshes what the moved rows affect.
+    """
+
+    def _update_order(self, updated_items, extra_model_filters):
+        result = super()._update_order(updated_items, extra_model_filters)
+        self.refresh_sorted([pk for pk, _ in updated_items])
+        return result
+
+    def _move_item(self, startorder, endorder, extra_model_filters):
+        result = super()._move_item(startorder, endorder, extra_model_filters)
+        # The dragged row and every row it shifted now sit between the two positions
+        low, high = sorted((startorder, endorder))
+        moved = self.model.objects.filter(
+            **{f"{self.default_order_field}__range": (low, high)}, **(extra_model_filters or {})
+        )
+        self.refresh_sorted(list(moved.values_list("pk", flat=True)))
+        return result
+
+    def refresh_sorted(self, pks):
+        """Refresh the category summaries and cached responses the rows ``pks`` appear in"""
+        raise NotImplementedError
+
+
 # ─── Category Cover Inline ────────────────────────────────────────────────────
 
 class CategoryCoverInline(SortableTabularInline):
@@ -40,7 +170,7 @@ class CategoryCoverInline(SortableTabularInline):
     verbose_name_plural = "🖼️ Coperți Categorie — trage pentru reordonare"
 
     def preview(self, obj):
-        return thumbnail(obj.image.url if obj.image else None, size=16)
+        return thumbnail(resized_url(obj.image.name, THUMB_SIZE), size=16)
 
     preview.short_description = "Preview"
 
@@ -63,11 +193,11 @@ class CategoryAdmin(SortableAdminBase, admin.ModelAdmin):
 
     @admin.display(description="Copertă")
     def cover_thumb(self, obj):
-        return thumbnail(obj.cover_url, size=14)
+        return thumbnail(resized_url(obj.cover_path, THUMB_SIZE), size=14)
 
     @admin.display(description="Albume publicate")
     def album_count_badge(self, obj):
-        count = obj.albums.filter(is_published=True).count()
+        count = obj.published_album_count
         css = "badge-success" if count > 0 else "badge-ghost"
         return badge(f"{count} albume", css, "images")
 
@@ -75,7 +205,7 @@ class CategoryAdmin(SortableAdminBase, admin.ModelAdmin):
 # ─── Category Cover Admin ─────────────────────────────────────────────────────
 
 @admin.register(CategoryCover)
-class CategoryCoverAdmin(SortableAdminMixin, admin.ModelAdmin):
+class CategoryCoverAdmin(CatalogueSortMixin, SortableAdminMixin, admin.ModelAdmin):
     list_display = [
         "preview_thumb",
         "category",
@@ -86,6 +216,7 @@ class CategoryCoverAdmin(SortableAdminMixin, admin.ModelAdmin):
     ]
     list_filter = ["category", "is_active"]
     list_editable = ["order", "is_active"]
+    list_select_related = ["category"]
     search_fields = ["category__name", "title"]
     readonly_fields = ["preview_large"]
 
@@ -98,9 +229,16 @@ class CategoryCoverAdmin(SortableAdminMixin, admin.ModelAdmin):
         }),
     )
 
+    def refresh_sorted(self, pks):
+        # The latest active cover becomes the category cover
+        Category.refresh_summaries(
+            set(CategoryCover.objects.filter(pk__in=pks).values_list("category_id", flat=True))
+        )
+        bump("catalogue")
+
     @admin.display(description="Preview")
     def preview_thumb(self, obj):
-        return thumbnail(obj.image.url if obj.image else None, size=14)
+        return thumbnail(resized_url(obj.image.name, THUMB_SIZE), size=14)
 
     @admin.display(description="Preview mare")
     def preview_large(self, obj):
@@ -109,7 +247,7 @@ class CategoryCoverAdmin(SortableAdminMixin, admin.ModelAdmin):
                 '<div class="card w-fit shadow-xl mt-2"><figure>'
                 '<img src="{}" style="max-height:300px;max-width:500px;object-fit:cover;" />'
                 '</figure></div>',
-                obj.image.url,
+                resized_url(obj.image.name, PREVIEW_SIZE),
             )
         return mark_safe(
             '<div class="alert alert-info mt-2">'
@@ -121,7 +259,7 @@ class CategoryCoverAdmin(SortableAdminMixin, admin.ModelAdmin):
 # ─── Album Admin ──────────────────────────────────────────────────────────────
 
 @admin.register(Album)
-class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
+class AlbumAdmin(LargeChangelistMixin, CatalogueSortMixin, SortableAdminMixin, admin.ModelAdmin):
     list_display = [
         "cover_thumb", "name", "category", "date",
         "location", "photo_count_badge", "published_badge",
@@ -131,6 +269,7 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
     search_fields = ["name", "description", "location"]
     prepopulated_fields = {"slug": ("name",)}
     list_editable = ["is_published"]
+    list_select_related = ["category"]
     date_hierarchy = "date"
     readonly_fields = ["cover_preview"]
     fieldsets = (
@@ -150,6 +289,21 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Photo count and the fallback cover for every row in the same query;
+        # the category for __str__, which the autocomplete view also renders
+        first_photo = Photo.objects.filter(album=OuterRef("pk")).order_by("order", "uploaded_at")
+        # GROUP BY drops Meta.ordering, and adminsortable2 paginates this queryset as-is
+        return super().get_queryset(request).select_related("category").annotate(
+            photo_count=Count("photos"),
+            first_photo_image=Subquery(first_photo.values("image")[:1]),
+        ).order_by(*Album._meta.ordering)
+
+    def refresh_sorted(self, pks):
+        # The first published album can be its category's fallback cover
+        Category.refresh_summaries(set(Album.objects.filter(pk__in=pks).values_list("category_id", flat=True)))
+        invalidate_albums(pks)
+
     def get_urls(self):
         urls = super().get_urls()
         custom = [
@@ -158,11 +312,21 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
                 self.admin_site.admin_view(self.upload_photos_view),
                 name="photos_album_upload",
             ),
+            path(
+                "<int:album_id>/photos/",
+                self.admin_site.admin_view(self.photos_page_view),
+                name="photos_album_photos",
+            ),
             path(
                 "<int:album_id>/photos/reorder/",
                 self.admin_site.admin_view(self.reorder_photos_view),
                 name="photos_album_reorder",
             ),
+            path(
+                "photos/<int:photo_id>/move/",
+                self.admin_site.admin_view(self.move_photo_view),
+                name="photos_photo_move",
+            ),
             path(
                 "photos/<int:photo_id>/delete/",
                 self.admin_site.admin_view(self.delete_photo_view),
@@ -180,36 +344,61 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
         if request.method != "POST":
             return JsonResponse({"error": "POST only"}, status=405)
 
-        album = Album.objects.get(pk=album_id)
-        uploaded = []
-        files = request.FILES.getlist("images")
-
-        for i, f in enumerate(files):
-            last_order = album.photos.order_by("-order").values_list("order", flat=True).first() or 0
-            photo = Photo(album=album, image=f, order=last_order + i + 1)
-            photo.save()
-            uploaded.append({
-                "id": photo.pk,
-                "url": photo.image.url,
-                "order": photo.order,
-                "is_featured": photo.is_featured,
-                "caption": photo.caption,
-            })
-
-        return JsonResponse({"uploaded": uploaded})
+        album = get_object_or_404(Album, pk=album_id)
+        try:
+            photos = upload_photos(album, request.FILES.getlist("images"))
+        except ValidationError as e:
+            return JsonResponse({"error": e.messages}, status=400)
+
+        return JsonResponse({"uploaded": [
+            {
+                **grid_entry(photo.pk, photo.image.name, photo.order, photo.is_featured, photo.caption),
+                "processing_status": photo.processing_status,
+            }
+            for photo in photos
+        ]})
+
+    def photo_page(self, album_id, offset, limit):
+        """{"photos": [...], "count": total} for the album photo grid"""
+        photos = Photo.objects.filter(album_id=album_id)
+        rows = photos.order_by("order", "uploaded_at").values_list(
+            "id", "image", "order", "is_featured", "caption"
+        )[offset:offset + limit]
+        return {
+            "photos": [grid_entry(*row) for row in rows],
+            "count": photos.count(),
+        }
+
+    def photos_page_view(self, request, album_id):
+        try:
+            offset = max(int(request.GET.get("offset", 0)), 0)
+            limit = min(max(int(request.GET.get("limit", PHOTO_PAGE_SIZE)), 1), PHOTO_PAGE_MAX)
+        except ValueError:
+            return JsonResponse({"error": "offset and limit must be integers"}, status=400)
+
+        return JsonResponse(self.photo_page(album_id, offset, limit))
 
     def reorder_photos_view(self, request, album_id):
         if request.method != "POST":
             return JsonResponse({"error": "POST only"}, status=405)
 
         data = json.loads(request.body)
-        order_map = data.get("order", [])
-
-        for item in order_map:
-            Photo.objects.filter(pk=item["id"], album_id=album_id).update(order=item["order"])
+        order_map = sorted(data.get("order", []), key=lambda item: item["order"])
+        reorder_photos(album_id, [item["id"] for item in order_map])
 
         return JsonResponse({"ok": True})
 
+    def move_photo_view(self, request, photo_id):
+        if request.method != "POST":
+            return JsonResponse({"error": "POST only"}, status=405)
+
+        photo = Photo.objects.get(pk=photo_id)
+        before_id = json.loads(request.body).get("before")
+        before = Photo.objects.get(pk=before_id, album_id=photo.album_id) if before_id else None
+        move_photo(photo, before=before)
+
+        return JsonResponse({"ok": True, "order": photo.order})
+
     def delete_photo_view(self, request, photo_id):
         if request.method != "POST":
             return JsonResponse({"error": "POST only"}, status=405)
@@ -230,21 +419,26 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
     def change_view(self, request, object_id, form_url="", extra_context=None):
         extra_context = extra_context or {}
         if object_id:
-            album = Album.objects.prefetch_related("photos").get(pk=object_id)
-            photos = list(album.photos.order_by("order", "uploaded_at").values(
-                "id", "image", "order", "is_featured", "caption"
-            ))
-            media_url = settings.MEDIA_URL
-            for p in photos:
-                p["url"] = media_url + p["image"]
-                del p["image"]
-            extra_context["photo_grid_data"] = json.dumps(photos)
+            # Only the first page; the grid loads the rest from photos_page_view
+            page = self.photo_page(object_id, 0, PHOTO_PAGE_SIZE)
+            extra_context["photo_grid_data"] = json.dumps(page["photos"])
+            extra_context["photo_grid_count"] = page["count"]
+            extra_context["photo_grid_page_size"] = PHOTO_PAGE_SIZE
             extra_context["album_id"] = object_id
         return super().change_view(request, object_id, form_url, extra_context)
 
+    def render_change_form(self, request, context, add=False, change=False, form_url="", obj=None):
+        if obj is not None:
+            # The photo grid uploads through the resumable API (photos.resumable)
+            context["resumable_upload_url"] = reverse("album-uploads", args=[obj.slug])
+            context["upload_chunk_size"] = settings.UPLOAD_CHUNK_MAX_BYTES
+        return super().render_change_form(request, context, add, change, form_url, obj)
+
     @admin.display(description="")
     def cover_thumb(self, obj):
-        return thumbnail(obj.cover_url, size=14)
+        # first_photo_image is annotated by get_queryset
+        name = obj.cover.name or getattr(obj, "first_photo_image", None)
+        return thumbnail(resized_url(name, THUMB_SIZE), size=14)
 
     @admin.display(description="Foto")
     def photo_count_badge(self, obj):
@@ -265,7 +459,7 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
                 '<div class="card w-fit shadow-xl mt-2"><figure>'
                 '<img src="{}" style="max-height:300px;max-width:500px;object-fit:cover;" />'
                 '</figure></div>',
-                obj.cover.url,
+                resized_url(obj.cover.name, PREVIEW_SIZE),
             )
         return mark_safe(
             '<div class="alert alert-info mt-2">'
@@ -277,29 +471,34 @@ class AlbumAdmin(SortableAdminMixin, admin.ModelAdmin):
 # ─── Photo Admin ──────────────────────────────────────────────────────────────
 
 @admin.register(Photo)
-class PhotoAdmin(SortableAdminMixin, admin.ModelAdmin):
+class PhotoAdmin(LargeChangelistMixin, CatalogueSortMixin, SortableAdminMixin, admin.ModelAdmin):
     list_display = [
         "thumb", "album", "order", "caption",
-        "dims_badge", "size_badge", "featured_badge", "uploaded_at", "is_featured",
+        "dims_badge", "size_badge", "status_badge", "featured_badge", "uploaded_at", "is_featured",
     ]
-    list_filter = ["album__category", "album", "is_featured"]
+    list_filter = ["album__category", ("album", AlbumAutocompleteFilter), "is_featured", "processing_status"]
     search_fields = ["album__name", "caption", "alt_text"]
     list_editable = ["order", "caption", "is_featured"]
-    list_select_related = ["album"]
-    readonly_fields = ["preview_large", "width", "height", "file_size", "uploaded_at"]
+    # Album.__str__ includes the category
+    list_select_related = ["album__category"]
+    readonly_fields = ["preview_large", "width", "height", "file_size", "processing_status", "uploaded_at"]
 
     fieldsets = (
         ("🖼️ Fotografie", {"fields": ("album", "image", "preview_large")}),
         ("📝 Detalii", {"fields": ("caption", "alt_text", "is_featured", "order")}),
         ("📊 Metadata", {
-            "fields": ("width", "height", "file_size", "uploaded_at"),
+            "fields": ("width", "height", "file_size", "processing_status", "uploaded_at"),
             "classes": ("collapse",),
         }),
     )
 
+    def refresh_sorted(self, pks):
+        # Photo order feeds no category summary: only the albums' responses change
+        invalidate_albums(set(Photo.objects.filter(pk__in=pks).values_list("album_id", flat=True)))
+
     @admin.display(description="Preview")
     def thumb(self, obj):
-        return thumbnail(obj.image.url if obj.image else None, size=14)
+        return thumbnail(resized_url(obj.image.name, THUMB_SIZE), size=14)
 
     @admin.display(description="Preview mare")
     def preview_large(self, obj):
@@ -308,7 +507,7 @@ class PhotoAdmin(SortableAdminMixin, admin.ModelAdmin):
                 '<div class="card w-fit shadow-xl mt-2"><figure>'
                 '<img src="{}" style="max-height:400px;max-width:600px;object-fit:cover;" />'
                 '</figure></div>',
-                obj.image.url,
+                resized_url(obj.image.name, PREVIEW_SIZE),
             )
         return "—"
 
@@ -326,8 +525,43 @@ class PhotoAdmin(SortableAdminMixin, admin.ModelAdmin):
             return badge(f"{mb} MB", css)
         return "—"
 
+    @admin.display(description="Procesare")
+    def status_badge(self, obj):
+        return badge(obj.get_processing_status_display(), STATUS_BADGES[obj.processing_status])
+
     @admin.display(description="Featured")
     def featured_badge(self, obj):
         if obj.is_featured:
             return badge("Featured", "badge-warning", "star")
-        return mark_safe('<span class="badge badge-ghost text-xs">—</span>')
\ No newline at end of file
+        return mark_safe('<span class="badge badge-ghost text-xs">—</span>')
+
+
+# ─── Image Job Admin ──────────────────────────────────────────────────────────
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "object_id", "status", "attempts", "run_after", "updated_at"]
+    list_filter = ["status", "kind"]
+    readonly_fields = [
+        "kind", "object_id", "source_name", "attempts", "max_attempts",
+        "locked_at", "last_error", "created_at", "updated_at",
+    ]
+    fields = readonly_fields[:3] + ["status", "run_after"] + readonly_fields[3:]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path(
+                "stats/",
+                self.admin_site.admin_view(self.stats_view),
+                name="photos_imagejob_stats",
+            ),
+        ]
+        return custom + urls
+
+    def stats_view(self, request):
+        """Queue depth and image-memory admission state, for monitoring"""
+        return JsonResponse(queue_stats())
@@ -0,0 +1,157 @@
+"""
+Memory-aware admission control for Pillow work.
+
+Every decode reserves its estimated bitmap size in a small JSON ledger kept
+next to a lock file. Any process that can see the directory (gunicorn
+workers, the image job worker and its children, other containers sharing
+the volume) draws from the same budget. Work that does not fit waits for
+room; work that never could, or that waits past the timeout, is rejected.
+"""
+import fcntl
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+
+from PIL import Image
+
+from .utils import fit_size, prepare_draft
+
+# Reservations older than this are assumed to belong to a dead process on
+# another host (same-host ones are checked by pid)
+LEASE_SECONDS = 15 * 60
+
+
+class AdmissionRejected(Exception):
+    """The image can't be processed within the memory budget right now"""
+
+
+def estimate_decode_bytes(source, max_width=None, max_height=None):
+    """
+    Peak bitmap memory of decoding ``source``: width x height x bands from the
+    header, after the JPEG draft() scaling the resize engine would apply, x2
+    for the resized / converted copy that briefly coexists with it.
+    """
+    with Image.open(source) as img:
+        if max_width and max_height:
+            prepare_draft(img, fit_size(img.size, max_width, max_height))
+        width, height = img.size
+        bands = max(len(img.getbands()), 3)
+    return width * height * bands * 2
+
+
+class AdmissionController:
+    def __init__(self, directory, budget, timeout=60.0, poll=0.1):
+        self.directory = directory
+        self.budget = budget
+        self.timeout = timeout
+        self.poll = poll
+
+    @property
+    def _lock_path(self):
+        return os.path.join(self.directory, "image-admission.lock")
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.directory, "image-admission.json")
+
+    @contextmanager
+    def _locked_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self._state_path) as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                state.setdefault("reserved", {})
+                state.setdefault("waiting", {})
+                self._prune(state)
+
+                yield state
+
+                tmp = f"{self._state_path}.{os.getpid()}"
+                with open(tmp, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self._state_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _alive(entry):
+        if entry["host"] != socket.gethostname():
+            return time.time() - entry["ts"] < LEASE_SECONDS
+        try:
+            os.kill(entry["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _prune(self, state):
+        for key in ("reserved", "waiting"):
+            state[key] = {t: e for t, e in state[key].items() if self._alive(e)}
+
+    @contextmanager
+    def admit(self, cost):
+        """Block until ``cost`` bytes fit in the budget, then hold them"""
+        if cost > self.budget:
+            raise AdmissionRejected(
+                f"Image needs ~{cost / 2**20:.0f}MB, budget is {self.budget / 2**20:.0f}MB"
+            )
+
+        token = uuid.uuid4().hex
+        entry = {"bytes": cost, "pid": os.getpid(), "host": socket.gethostname(), "ts": time.time()}
+        deadline = time.monotonic() + self.timeout
+        delay = self.poll
+
+        while True:
+            with self._locked_state() as state:
+                state["waiting"].pop(token, None)
+                in_use = sum(e["bytes"] for e in state["reserved"].values())
+                if in_use + cost <= self.budget:
+                    state["reserved"][token] = entry
+                    break
+                if time.monotonic() >= deadline:
+                    raise AdmissionRejected(
+                        f"Timed out after {self.timeout:.0f}s waiting for "
+                        f"{cost / 2**20:.0f}MB of image memory"
+                    )
+                state["waiting"][token] = entry
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+        try:
+            yield
+        finally:
+            with self._locked_state() as state:
+                state["reserved"].pop(token, None)
+
+    def call(self, cost, fn, *args, **kwargs):
+        """Run ``fn`` once ``cost`` bytes are admitted (ProcessPoolExecutor-friendly)"""
+        with self.admit(cost):
+            return fn(*args, **kwargs)
+
+    def stats(self):
+        with self._locked_state() as state:
+            return {
+                "budget_bytes": self.budget,
+                "reserved_bytes": sum(e["bytes"] for e in state["reserved"].values()),
+                "running": len(state["reserved"]),
+                "waiting": len(state["waiting"]),
+            }
+
+
+def get_controller(timeout=None):
+    from django.conf import settings
+
+    return AdmissionController(
+        settings.IMAGE_ADMISSION_DIR,
+        settings.IMAGE_MEMORY_BUDGET,
+        settings.IMAGE_ADMISSION_TIMEOUT if timeout is None else timeout,
+    )
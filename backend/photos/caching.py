@@ -0,0 +1,260 @@
+"""
+Response cache for the public read-only API.
+
+Rendered JSON is stored under a key made of the request (host, path, the
+query parameters the view reads, Accept header) and the current version
+token of every scope it depends on:
+
+    all              every response; bumped by catalogue-wide bulk changes
+    catalogue        category list and the unfiltered album list
+    category:<slug>  album list filtered by that category
+    album:<slug>     album detail and its photos
+
+Changing a model bumps the affected scopes (see signals.py), so stale
+entries are never read again and simply expire. Concurrent misses on the
+same key are coalesced across processes with an flock in
+API_CACHE_LOCK_DIR: one request renders while the others wait for it.
+
+Responses also carry ETag / Last-Modified validators built from the scope
+tokens (each records when it was bumped) and a cheap aggregate over the
+album / category rows (max(updated_at), row count), so conditional
+requests get a 304 before anything is serialized. Photo writes bump
+their album's tokens; nothing joins photos at read time.
+"""
+import fcntl
+import hashlib
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+
+VERSION_PREFIX = "api:version:"
+RESPONSE_PREFIX = "api:response:"
+
+# Cold keys share lock files by the last hex digits of their hash (256 files),
+# so the lock directory stays small however many keys there are
+LOCK_STRIPE_CHARS = 2
+# How long a request waits for another one rendering the same key
+LOCK_WAIT = 5.0
+LOCK_POLL = 0.05
+
+
+def _new_token():
+    # When the scope changed, for Last-Modified, plus randomness so
+    # concurrent bumps never produce the same token
+    return f"{time.time():.6f}-{uuid.uuid4().hex}"
+
+
+def token_time(token):
+    """When ``token`` was issued (None for tokens from before timestamps were recorded)"""
+    try:
+        return datetime.fromtimestamp(float(token.split("-", 1)[0]), tz=timezone.utc)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _versions(scopes):
+    """Current token of each scope, creating tokens for scopes never seen"""
+    keys = [VERSION_PREFIX + scope for scope in scopes]
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            # A fresh random token, never a counter: an evicted version key
+            # must not come back with a value older entries were stored under
+            cache.add(key, _new_token(), timeout=None)
+            tokens[key] = cache.get(key)
+    return [tokens[key] for key in keys]
+
+
+def bump(*scopes):
+    """Invalidate every cached response depending on ``scopes`` once the transaction commits"""
+    scopes = {scope for scope in scopes if scope}
+
+    def _bump():
+        cache.set_many({VERSION_PREFIX + scope: _new_token() for scope in scopes}, timeout=None)
+
+    if scopes:
+        transaction.on_commit(_bump)
+
+
+def invalidate_all():
+    bump("all")
+
+
+class _AlbumInvalidation:
+    """
+    Albums invalidated within one transaction; on commit their slugs are
+    read with a single query, however many saves asked for it.
+    """
+
+    def __init__(self, album_ids):
+        self.album_ids = set(album_ids)
+
+    def __call__(self):
+        from .models import Album
+
+        scopes = ["catalogue"]
+        rows = Album.objects.filter(pk__in=self.album_ids).values_list("slug", "category__slug")
+        for slug, category_slug in rows:
+            scopes += [f"album:{slug}", f"category:{category_slug}"]
+        bump(*scopes)
+
+
+def invalidate_albums(album_ids):
+    """Album detail, photo list and the lists showing these albums, once the transaction commits"""
+    album_ids = {pk for pk in album_ids if pk}
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        # Join the invalidation this transaction already queued (a savepoint
+        # rollback drops it from run_on_commit, and a new one is queued)
+        for _, callback, _ in connection.run_on_commit:
+            if isinstance(callback, _AlbumInvalidation):
+                callback.album_ids |= album_ids
+                return
+    transaction.on_commit(_AlbumInvalidation(album_ids))
+
+
+def response_key(request, params, versions):
+    """Only the query parameters in ``params`` count: others can't change the response"""
+    query = urlencode(sorted((name, request.GET.getlist(name)) for name in params if name in request.GET), doseq=True)
+    raw = "|".join([
+        request.get_host(),
+        request.path,
+        query,
+        request.META.get("HTTP_ACCEPT", ""),
+        *versions,
+    ])
+    return RESPONSE_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def make_etag(versions, summary):
+    """Quoted ETag from the scope tokens and a (max updated_at, count, ...) summary"""
+    raw = "|".join([*versions, *(str(value) for value in summary)])
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+
+@contextmanager
+def _render_lock(key):
+    """
+    flock on the lock file ``key`` hashes to, shared by every process using
+    API_CACHE_LOCK_DIR; yields False if it wasn't free within LOCK_WAIT.
+    The kernel releases it if the holder dies.
+    """
+    os.makedirs(settings.API_CACHE_LOCK_DIR, exist_ok=True)
+    path = os.path.join(settings.API_CACHE_LOCK_DIR, f"{key[-LOCK_STRIPE_CHARS:]}.lock")
+    with open(path, "a") as f:
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    locked = False
+                    break
+                time.sleep(LOCK_POLL)
+        try:
+            yield locked
+        finally:
+            if locked:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _hit_response(hit):
+    content, content_type = hit
+    response = HttpResponse(content, content_type=content_type)
+    response["Vary"] = "Accept"
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def _render(key, render, store):
+    response = render()
+    response.render()
+    if store and response.status_code == 200 and response["Content-Type"].startswith("application/json"):
+        cache.set(key, (response.content, response["Content-Type"]), settings.API_CACHE_TIMEOUT)
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def cached_response(key, render, store=True):
+    """
+    Return the cached response for ``key`` or ``render()`` it. Only one
+    caller, across processes, renders a cold key; the rest wait up to
+    LOCK_WAIT for the lock and then find its result in the cache.
+    With ``store=False`` a miss is rendered but neither locked nor stored.
+    """
+    hit = cache.get(key)
+    if hit is not None:
+        return _hit_response(hit)
+    if not store:
+        return _render(key, render, store)
+
+    with _render_lock(key):
+        # Rendered by whoever held the lock before us
+        hit = cache.get(key)
+        if hit is not None:
+            return _hit_response(hit)
+        return _render(key, render, store)
+
+
+class CachedResponseMixin:
+    """
+    Serve GET requests of a read-only viewset from the response cache, with
+    conditional-request support. Subclasses list the scopes a request
+    depends on in ``cache_scopes``, the query parameters it reads in
+    ``cache_params``, and return a cheap summary of the rows it reads from
+    ``last_modified`` (None lets the view handle 404s).
+    """
+    cache_params = ()
+
+    def cache_scopes(self, request, **kwargs):
+        return ["catalogue"]
+
+    def last_modified(self, request, **kwargs):
+        """(max updated_at, row count) of the rows the response is built from"""
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        versions = _versions(["all", *self.cache_scopes(request, **kwargs)])
+        summary = self.last_modified(request, **kwargs)
+        etag = modified = None
+        if summary is not None:
+            etag = make_etag(versions, summary)
+            modified = max(filter(None, [summary[0], *map(token_time, versions)]), default=None)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=modified and int(modified.timestamp())
+            )
+            if not_modified is not None:
+                return self._add_validators(not_modified, etag, modified)
+
+        key = response_key(request, self.cache_params, versions)
+        # Links in the body repeat the query string, so a request with
+        # parameters the view ignores may read the entry but not write it
+        store = set(request.GET) <= set(self.cache_params)
+        response = cached_response(
+            key, lambda: super(CachedResponseMixin, self).dispatch(request, *args, **kwargs), store=store
+        )
+        if response.status_code == 200 and etag:
+            self._add_validators(response, etag, modified)
+        return response
+
+    def _add_validators(self, response, etag, modified):
+        response["ETag"] = etag
+        if modified:
+            response["Last-Modified"] = http_date(modified.timestamp())
+        # Let browsers and CDNs keep the body but revalidate before reuse
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
@@ -0,0 +1,185 @@
+"""
+Read-path serialization for the public API.
+
+Produces exactly what the ModelSerializers in serializers.py produce (same
+keys, order and value formats), but from `.values()` rows instead of model
+instances and with the absolute media URL prefix built once per response
+instead of once per file. `manage.py benchmark_serializers` checks that
+both paths render byte-identical JSON and compares their speed.
+"""
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+PHOTO_FIELDS = (
+    'id', 'image', 'renditions', 'width', 'height', 'blurhash', 'color',
+    'caption', 'order', 'processing_status', 'uploaded_at',
+)
+
+ALBUM_LIST_FIELDS = (
+    'id', 'name', 'slug', 'category', 'category__name', 'date', 'description',
+    'cover', 'cover_renditions', 'cover_blurhash', 'cover_color', 'photo_count',
+    'is_published', 'order', 'created_at',
+)
+
+HOME_ALBUM_FIELDS = (
+    'id', 'name', 'slug', 'date', 'cover', 'cover_renditions', 'cover_blurhash', 'cover_color', 'created_at',
+)
+
+CATEGORY_FIELDS = (
+    'id', 'name', 'slug', 'cover_path', 'cover_renditions', 'cover_blurhash', 'cover_color',
+    'published_album_count',
+)
+
+
+def datetime_repr(value):
+    """DRF DateTimeField (ISO 8601, current timezone, UTC as 'Z')"""
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def date_repr(value):
+    return value.isoformat() if value is not None else None
+
+
+class MediaURLs:
+    """Absolute URLs of stored files for one request"""
+
+    def __init__(self, request, storage=default_storage):
+        self.request = request
+        self.storage = storage
+        # Local storage URLs are base_url + quoted name: resolve the base once.
+        # Other backends (S3, ...) may sign or vary per file, so ask them each time.
+        self.prefix = None
+        if request is not None and isinstance(storage, FileSystemStorage):
+            self.prefix = request.build_absolute_uri(storage.base_url)
+
+    def absolute(self, name):
+        if not name:
+            return None
+        if self.prefix is not None:
+            return self.prefix + filepath_to_uri(name)
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+    def renditions(self, renditions):
+        """Same output as serializers.rendition_urls"""
+        if not renditions or not self.request:
+            return {}
+        return {
+            width: {
+                'url': self.absolute(r['name']),
+                'width': r['width'],
+                'height': r['height'],
+            }
+            for width, r in sorted(renditions.items(), key=lambda item: int(item[0]))
+        }
+
+
+def photo_rows(rows, media):
+    """PhotoSerializer output for `.values(*PHOTO_FIELDS)` rows"""
+    data = []
+    for row in rows:
+        url = media.absolute(row['image'])
+        data.append({
+            'id': row['id'],
+            'image': url,
+            'image_url': url,
+            'renditions': media.renditions(row['renditions']),
+            'width': row['width'],
+            'height': row['height'],
+            'blurhash': row['blurhash'],
+            'color': row['color'],
+            'caption': row['caption'],
+            'order': row['order'],
+            'processing_status': row['processing_status'],
+            'uploaded_at': datetime_repr(row['uploaded_at']),
+        })
+    return data
+
+
+def album_list_rows(rows, media):
+    """AlbumListSerializer output for `.values(*ALBUM_LIST_FIELDS)` rows"""
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'slug': row['slug'],
+            'category': row['category'],
+            'category_name': row['category__name'],
+            'date': date_repr(row['date']),
+            'description': row['description'],
+            'cover_url': media.absolute(row['cover']),
+            'cover_renditions': media.renditions(row['cover_renditions']),
+            'cover_blurhash': row['cover_blurhash'],
+            'cover_color': row['cover_color'],
+            'photo_count': row['photo_count'],
+            'is_published': row['is_published'],
+            'order': row['order'],
+            'created_at': datetime_repr(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+def album_detail(album, photos, photos_next, media):
+    """AlbumDetailSerializer output for an album instance and its photo window rows"""
+    return {
+        'id': album.id,
+        'name': album.name,
+        'slug': album.slug,
+        'category': album.category_id,
+        'category_name': album.category.name,
+        'date': date_repr(album.date),
+        'description': album.description,
+        'cover_url': media.absolute(album.cover.name),
+        'cover_blurhash': album.cover_blurhash,
+        'cover_color': album.cover_color,
+        'photos': photo_rows(photos, media),
+        'photos_next': photos_next,
+        'photo_count': album.photo_count,
+        'is_published': album.is_published,
+        'order': album.order,
+        'created_at': datetime_repr(album.created_at),
+        'updated_at': datetime_repr(album.updated_at),
+    }
+
+
+def home_album_rows(rows, media):
+    """HomeAlbumSerializer output for `.values(*HOME_ALBUM_FIELDS)` rows"""
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'slug': row['slug'],
+            'date': date_repr(row['date']),
+            'cover_url': media.absolute(row['cover']),
+            'cover_renditions': media.renditions(row['cover_renditions']),
+            'cover_blurhash': row['cover_blurhash'],
+            'cover_color': row['cover_color'],
+            'created_at': datetime_repr(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+def category_rows(rows, media):
+    """CategorySerializer output for `.values(*CATEGORY_FIELDS)` rows"""
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'slug': row['slug'],
+            # Category.cover_url is the storage URL as-is (not made absolute)
+            'cover_url': media.storage.url(row['cover_path']) if row['cover_path'] else None,
+            'cover_renditions': media.renditions(row['cover_renditions']),
+            'cover_blurhash': row['cover_blurhash'],
+            'cover_color': row['cover_color'],
+            'published_album_count': row['published_album_count'],
+        }
+        for row in rows
+    ]
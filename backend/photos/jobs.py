@@ -0,0 +1,331 @@
+import logging
+import os
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .admission import estimate_decode_bytes, get_controller
+from .caching import bump, invalidate_albums
+from .models import Category, Album, Photo, CategoryCover, ImageJob
+from .storage import release_files, rendition_files
+from .utils import ingest_image, store_renditions
+
+logger = logging.getLogger(__name__)
+
+# Jobs stuck in RUNNING longer than this belong to a dead worker and are reclaimed
+STALE_AFTER = timedelta(minutes=10)
+
+# kind -> (model, image field, renditions field, ingest_image kwargs)
+PROCESSING = {
+    ImageJob.Kind.PHOTO: (
+        Photo, "image", "renditions",
+        {"quality": 88, "max_width": 2400, "max_height": 2400},  # Higher quality for portfolio photos
+    ),
+    ImageJob.Kind.ALBUM_COVER: (
+        Album, "cover", "cover_renditions",
+        {"quality": 85, "max_width": 1920, "max_height": 1920},
+    ),
+    ImageJob.Kind.CATEGORY_COVER: (
+        CategoryCover, "image", "renditions",
+        {"quality": 85, "max_width": 1920, "max_height": 1920},
+    ),
+}
+
+KIND_FOR_MODEL = {model: kind for kind, (model, *_) in PROCESSING.items()}
+
+# model -> (BlurHash field, dominant colour field)
+PLACEHOLDER_FIELDS = {
+    Photo: ("blurhash", "color"),
+    Album: ("cover_blurhash", "cover_color"),
+    CategoryCover: ("blurhash", "color"),
+}
+
+
+def enqueue(instance):
+    """Queue processing of the image currently stored on ``instance``"""
+    kind = KIND_FOR_MODEL[type(instance)]
+    _, field_name, _, _ = PROCESSING[kind]
+    return ImageJob.objects.create(
+        kind=kind,
+        object_id=instance.pk,
+        source_name=getattr(instance, field_name).name,
+    )
+
+
+def claim_jobs(limit=1):
+    """
+    Atomically mark up to ``limit`` due jobs as RUNNING and return them.
+    SKIP LOCKED lets several workers poll the same table without blocking.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImageJob.Status.PENDING, run_after__lte=now)
+                | Q(status=ImageJob.Status.RUNNING, locked_at__lt=now - STALE_AFTER)
+            )
+            .order_by("id")[:limit]
+        )
+        for job in jobs:
+            job.status = ImageJob.Status.RUNNING
+            job.attempts += 1
+            job.locked_at = now
+            job.updated_at = now
+        ImageJob.objects.bulk_update(jobs, ["status", "attempts", "locked_at", "updated_at"])
+    return jobs
+
+
+def run_batch(jobs, executor=None):
+    """
+    Process claimed jobs. The Pillow work for each job runs in ``executor``
+    (a ProcessPoolExecutor) when given, so a batch uses one core per image;
+    results are then written back with one bulk_update per model.
+
+    Returns:
+        tuple: (done, failed)
+    """
+    prepared, skipped = [], []
+    failed = 0
+    for job in jobs:
+        try:
+            spec = prepare(job)
+        except Exception as e:
+            logger.exception("Image job %s failed", job.pk)
+            _fail(job, e)
+            failed += 1
+            continue
+        if spec is None:
+            skipped.append(job)
+        else:
+            prepared.append((job, spec))
+
+    photo_ids = [spec["obj"].pk for job, spec in prepared if job.kind == ImageJob.Kind.PHOTO]
+    if photo_ids:
+        Photo.objects.filter(pk__in=photo_ids).update(
+            processing_status=Photo.ProcessingStatus.PROCESSING
+        )
+
+    # Every decode draws from the cross-process memory budget; jobs that
+    # can't be admitted fail with AdmissionRejected and are retried later
+    admission = get_controller()
+    futures = []
+    for job, spec in prepared:
+        kwargs = dict(PROCESSING[job.kind][3], spool_dir=settings.IMAGE_SPOOL_DIR)
+        args = (spec["cost"], ingest_image, spec["source"])
+        if executor is not None:
+            futures.append((job, spec, executor.submit(admission.call, *args, **kwargs)))
+        else:
+            futures.append((job, spec, _run_inline(admission.call, *args, **kwargs)))
+
+    results = []
+    for job, spec, future in futures:
+        try:
+            results.append((job, spec, future.result()))
+        except Exception as e:
+            logger.exception("Image job %s failed", job.pk)
+            _fail(job, e)
+            failed += 1
+        finally:
+            if spec.get("download"):
+                os.remove(spec["source"])
+
+    done_jobs, commit_failed = commit(results)
+    failed += commit_failed
+
+    finished = done_jobs + skipped
+    now = timezone.now()
+    for job in finished:
+        job.status = ImageJob.Status.DONE
+        job.last_error = ""
+        job.updated_at = now
+    ImageJob.objects.bulk_update(finished, ["status", "last_error", "updated_at"])
+    return len(done_jobs), failed
+
+
+class _run_inline:
+    """Future-like wrapper used when no process pool is configured"""
+
+    def __init__(self, fn, *args, **kwargs):
+        try:
+            self._result, self._error = fn(*args, **kwargs), None
+        except Exception as e:
+            self._result, self._error = None, e
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _fail(job, error):
+    job.last_error = "".join(traceback.format_exception(error))[-4000:]
+    if job.attempts >= job.max_attempts:
+        job.status = ImageJob.Status.FAILED
+        photo_status = Photo.ProcessingStatus.FAILED
+    else:
+        # Exponential backoff: 30s, 1m, 2m, 4m ...
+        job.status = ImageJob.Status.PENDING
+        job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (job.attempts - 1))
+        photo_status = Photo.ProcessingStatus.PENDING
+    if job.kind == ImageJob.Kind.PHOTO:
+        Photo.objects.filter(pk=job.object_id).update(processing_status=photo_status)
+    job.save(update_fields=["status", "last_error", "run_after", "updated_at"])
+
+
+def prepare(job):
+    """
+    Load the object a job points at and describe its source file.
+    Returns None (job done, nothing to do) when the object is gone or its
+    image was replaced by a newer upload, which has its own job.
+    """
+    model, field_name, _, _ = PROCESSING[job.kind]
+
+    obj = model.objects.filter(pk=job.object_id).first()
+    if obj is None:
+        return None
+    field_file = getattr(obj, field_name)
+    if not field_file or field_file.name != job.source_name:
+        return None
+
+    storage = field_file.storage
+    try:
+        spec = {"obj": obj, "source": storage.path(field_file.name)}
+    except NotImplementedError:
+        # Remote storage: stream it to a local temp file for the child process
+        with tempfile.NamedTemporaryFile(dir=settings.IMAGE_SPOOL_DIR, delete=False) as tmp:
+            with storage.open(field_file.name, "rb") as f:
+                for chunk in File(f).chunks():
+                    tmp.write(chunk)
+        spec = {"obj": obj, "source": tmp.name, "download": True}
+
+    compress_kwargs = PROCESSING[job.kind][3]
+    try:
+        spec["cost"] = estimate_decode_bytes(
+            spec["source"], compress_kwargs["max_width"], compress_kwargs["max_height"]
+        )
+    except Exception:
+        if spec.get("download"):
+            os.remove(spec["source"])
+        raise
+    return spec
+
+
+def commit(results):
+    """
+    Store the rendered files and point the rows at them, one bulk_update per
+    model. Rows whose image was replaced while rendering are left alone.
+
+    Returns:
+        tuple: (list of finished jobs, number of failures)
+    """
+    by_model = {}
+    failed = 0
+    for job, spec, result in results:
+        model, field_name, renditions_attr, _ = PROCESSING[job.kind]
+        obj = spec["obj"]
+        field_file = getattr(obj, field_name)
+        storage = field_file.storage
+        raw_name = field_file.name
+        old_renditions = getattr(obj, renditions_attr)
+
+        try:
+            # Stream the spooled file next to the raw upload; the raw file is
+            # only removed once the row points at the new one, so a failed
+            # attempt can retry
+            base = os.path.splitext(os.path.basename(raw_name))[0]
+            with open(result.path, "rb") as f:
+                field_file.save(f"{base}.jpg", File(f), save=False)
+            renditions = store_renditions(
+                storage, field_file.name, (result.width, result.height), result.renditions
+            )
+        except Exception as e:
+            logger.exception("Image job %s failed", job.pk)
+            _fail(job, e)
+            failed += 1
+            continue
+        finally:
+            result.cleanup()
+
+        setattr(obj, renditions_attr, renditions)
+        blurhash_attr, color_attr = PLACEHOLDER_FIELDS[model]
+        setattr(obj, blurhash_attr, result.blurhash)
+        setattr(obj, color_attr, result.color)
+        if model is Photo:
+            # All metadata comes from the same decode as the stored file
+            obj.width, obj.height = result.width, result.height
+            obj.file_size = result.file_size
+            obj.processing_status = Photo.ProcessingStatus.READY
+
+        by_model.setdefault(model, []).append(
+            (job, obj, raw_name, old_renditions)
+        )
+
+    finished = []
+    for model, entries in by_model.items():
+        _, field_name, renditions_attr, _ = PROCESSING[entries[0][0].kind]
+        fields = [field_name, renditions_attr, *PLACEHOLDER_FIELDS[model]]
+        if model is Photo:
+            fields += ["width", "height", "file_size", "processing_status"]
+
+        with transaction.atomic():
+            # Lock the rows and drop any whose image changed while rendering
+            current = dict(
+                model.objects.select_for_update()
+                .filter(pk__in=[obj.pk for _, obj, _, _ in entries])
+                .values_list("pk", field_name)
+            )
+            fresh = {obj.pk for _, obj, raw_name, _ in entries if current.get(obj.pk) == raw_name}
+            fresh_objs = [obj for _, obj, _, _ in entries if obj.pk in fresh]
+            # bulk_update so the pre_save/post_save receivers don't enqueue another job
+            model.objects.bulk_update(fresh_objs, fields)
+            if fresh_objs and model is not Photo:
+                # The stored cover was renamed / got renditions: update its category summary
+                Category.refresh_summaries({obj.category_id for obj in fresh_objs})
+            # No signals fire for bulk_update: drop the cached API responses ourselves
+            if fresh_objs and model is CategoryCover:
+                bump("catalogue")
+            elif fresh_objs:
+                invalidate_albums({obj.album_id if model is Photo else obj.pk for obj in fresh_objs})
+
+        # Files are content-addressed and may be shared with other rows:
+        # release_files only removes what nothing references any more
+        for job, obj, raw_name, old_renditions in entries:
+            field_file = getattr(obj, field_name)
+            storage = field_file.storage
+            renditions = getattr(obj, renditions_attr)
+            if obj.pk not in fresh:
+                release_files(storage, rendition_files(renditions))
+            else:
+                # The raw upload, and the previous image's files if it was replaced
+                current_names = set(rendition_files(renditions))
+                release_files(storage, [
+                    name for name in [raw_name, *rendition_files(old_renditions)]
+                    if name not in current_names
+                ])
+            finished.append(job)
+
+    return finished, failed
+
+
+def queue_stats():
+    """Jobs waiting in the table plus decodes waiting for image memory"""
+    counts = dict(
+        ImageJob.objects.order_by().values("status").annotate(n=Count("id")).values_list("status", "n")
+    )
+    admission = get_controller().stats()
+    return {
+        "queued_jobs": counts.get(ImageJob.Status.PENDING, 0),
+        "running_jobs": counts.get(ImageJob.Status.RUNNING, 0),
+        "failed_jobs": counts.get(ImageJob.Status.FAILED, 0),
+        "decodes_running": admission["running"],
+        "decodes_waiting": admission["waiting"],
+        "image_memory_reserved": admission["reserved_bytes"],
+        "image_memory_budget": admission["budget_bytes"],
+    }
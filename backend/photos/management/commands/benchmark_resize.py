@@ -0,0 +1,131 @@
+import statistics
+import time
+from io import BytesIO
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw, ImageFilter
+from photos.utils import fit_size, prepare_draft, resize_image
+
+
+def legacy_resize(source, target_size):
+    """The pre-engine compress_image path: full decode, then one LANCZOS pass"""
+    img = Image.open(source)
+    img.load()
+    decoded = img.size
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGB')
+    return img.resize(target_size, Image.LANCZOS), decoded
+
+
+def engine_resize(source, target_size):
+    img = Image.open(source)
+    prepare_draft(img, target_size)
+    img.load()
+    decoded = img.size
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGB')
+    return resize_image(img, target_size), decoded
+
+
+def _box_mean(a, k):
+    """Mean over every k x k window (valid region), via summed-area table"""
+    s = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def ssim(a, b, window=7):
+    """Mean structural similarity of two same-sized images, on luminance"""
+    x = np.asarray(a.convert('L'), dtype=np.float64)
+    y = np.asarray(b.convert('L'), dtype=np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    mx, my = _box_mean(x, window), _box_mean(y, window)
+    vx = _box_mean(x * x, window) - mx * mx
+    vy = _box_mean(y * y, window) - my * my
+    cxy = _box_mean(x * y, window) - mx * my
+
+    s = ((2 * mx * my + c1) * (2 * cxy + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+
+def synthetic_jpeg(width=6000, height=4000):
+    """Camera-sized test frame with gradients, hard edges and fine texture"""
+    gx = np.linspace(0, 255, width, dtype=np.float32)
+    gy = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    rgb = np.stack([
+        gx + 0 * gy,
+        gy + 0 * gx,
+        (gx + gy) / 2 + noise,
+    ], axis=-1)
+    img = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), 'RGB')
+
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, 240):
+        draw.line([(i, 0), (width - i, height)], fill=(255, 255, 255), width=3)
+        draw.ellipse([i, i % height, i + 180, (i % height) + 180], outline=(0, 0, 0), width=5)
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=92)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the draft()/reduce() resize engine with a full-decode LANCZOS "
+        "resize: timing, decoded bitmap size and SSIM"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("images", nargs="*", help="JPEG/PNG/WebP files (default: synthetic 6000x4000 JPEG)")
+        parser.add_argument("--max-size", type=int, default=2400, help="Bounding box of the output")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.98,
+            help="Fail if the engine output's SSIM against the legacy output is below this",
+        )
+
+    def handle(self, *args, **options):
+        sources = [(path, open(path, 'rb').read()) for path in options["images"]]
+        if not sources:
+            sources = [("synthetic 6000x4000", synthetic_jpeg())]
+
+        worst = 1.0
+        for label, data in sources:
+            with Image.open(BytesIO(data)) as probe:
+                target = fit_size(probe.size, options["max_size"], options["max_size"])
+
+            timings = {}
+            for name, fn in (("legacy", legacy_resize), ("engine", engine_resize)):
+                runs = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    result, decoded = fn(BytesIO(data), target)
+                    runs.append(time.perf_counter() - start)
+                timings[name] = (statistics.median(runs), result, decoded)
+
+            legacy_time, legacy_img, legacy_decoded = timings["legacy"]
+            engine_time, engine_img, engine_decoded = timings["engine"]
+            score = ssim(legacy_img, engine_img)
+            worst = min(worst, score)
+
+            bands = len(legacy_img.getbands())
+            self.stdout.write(
+                f"{label} -> {target[0]}x{target[1]}\n"
+                f"  legacy: {legacy_time * 1000:7.1f} ms, decoded "
+                f"{legacy_decoded[0]}x{legacy_decoded[1]} "
+                f"({legacy_decoded[0] * legacy_decoded[1] * bands / 2**20:.0f} MB)\n"
+                f"  engine: {engine_time * 1000:7.1f} ms, decoded "
+                f"{engine_decoded[0]}x{engine_decoded[1]} "
+                f"({engine_decoded[0] * engine_decoded[1] * bands / 2**20:.0f} MB)\n"
+                f"  speedup x{legacy_time / engine_time:.2f}, SSIM {score:.4f}"
+            )
+
+        if worst < options["threshold"]:
+            raise CommandError(f"SSIM {worst:.4f} below threshold {options['threshold']}")
+        self.stdout.write(self.style.SUCCESS(f"OK: worst SSIM {worst:.4f}"))
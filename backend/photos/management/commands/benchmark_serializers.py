@@ -0,0 +1,120 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from photos import fast_serializers as fast
+from photos.models import Album, Category
+from photos.pagination import AlbumCursorPagination, PhotoCursorPagination
+from photos.renderers import FastJSONRenderer
+from photos.serializers import (
+    AlbumDetailSerializer,
+    AlbumListSerializer,
+    CategorySerializer,
+    HomeAlbumSerializer,
+)
+
+
+def _published_albums():
+    return (
+        Album.objects.filter(is_published=True)
+        .select_related('category')
+        .annotate(photo_count=Count('photos'))
+    )
+
+
+def _home_albums():
+    return (
+        Album.objects.filter(is_published=True)
+        .annotate(rank=Window(RowNumber(), partition_by=F('category_id'), order_by=[F('order').asc(), F('date').desc()]))
+        .filter(rank__lte=3)
+        .order_by('category__name', 'rank')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public API payloads through the ModelSerializer path and the "
+        "values()/fast-renderer path, check they are byte-identical and time both"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--album", help="Slug of the album to use for the detail payload (default: largest)")
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/api/", HTTP_HOST="example.com")
+        album = _published_albums().order_by('-photo_count').first()
+        if options["album"]:
+            album = _published_albums().filter(slug=options["album"]).first()
+        if album is None:
+            raise CommandError("Needs at least one published album")
+
+        def legacy_detail():
+            album.photo_window = list(album.photos.order_by(*PhotoCursorPagination.ordering).select_related(None))
+            album.photos_next = None
+            return AlbumDetailSerializer(album, context={'request': request}).data
+
+        def lean_detail():
+            photos = album.photos.order_by(*PhotoCursorPagination.ordering).values(*fast.PHOTO_FIELDS)
+            return fast.album_detail(album, photos, None, fast.MediaURLs(request))
+
+        def legacy_home():
+            data = {}
+            albums = _home_albums().select_related('category')
+            for obj, item in zip(albums, HomeAlbumSerializer(albums, many=True, context={'request': request}).data):
+                data.setdefault(obj.category.slug, []).append(item)
+            return data
+
+        def lean_home():
+            data = {}
+            rows = _home_albums().values('category__slug', *fast.HOME_ALBUM_FIELDS)
+            for row, item in zip(rows, fast.home_album_rows(rows, fast.MediaURLs(request))):
+                data.setdefault(row['category__slug'], []).append(item)
+            return data
+
+        ordered = _published_albums().order_by(*AlbumCursorPagination.ordering)
+        payloads = {
+            "categories": (
+                lambda: CategorySerializer(Category.objects.all(), many=True, context={'request': request}).data,
+                lambda: fast.category_rows(Category.objects.values(*fast.CATEGORY_FIELDS), fast.MediaURLs(request)),
+            ),
+            "album list": (
+                lambda: AlbumListSerializer(ordered.all(), many=True, context={'request': request}).data,
+                lambda: fast.album_list_rows(ordered.values(*fast.ALBUM_LIST_FIELDS), fast.MediaURLs(request)),
+            ),
+            f"album detail ({album.photo_count} photos)": (legacy_detail, lean_detail),
+            "home": (legacy_home, lean_home),
+        }
+
+        mismatched = []
+        for name, (legacy, lean) in payloads.items():
+            results = {}
+            for label, build, renderer in (
+                ("serializer", legacy, JSONRenderer()),
+                ("values()", lean, FastJSONRenderer()),
+            ):
+                runs = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    body = renderer.render(build())
+                    runs.append(time.perf_counter() - start)
+                results[label] = (statistics.median(runs), body)
+
+            (old_time, old_body), (new_time, new_body) = results["serializer"], results["values()"]
+            same = old_body == new_body
+            if not same:
+                mismatched.append(name)
+            self.stdout.write(
+                f"{name}: {len(old_body) / 1024:.1f} KB\n"
+                f"  serializer: {old_time * 1000:7.2f} ms\n"
+                f"  values():   {new_time * 1000:7.2f} ms  (x{old_time / new_time:.1f})"
+                f"  {'identical' if same else 'DIFFERENT OUTPUT'}"
+            )
+
+        if mismatched:
+            raise CommandError(f"Output differs for: {', '.join(mismatched)}")
+        self.stdout.write(self.style.SUCCESS("OK: both paths render identical JSON"))
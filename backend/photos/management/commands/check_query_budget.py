@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from photos.caching import invalidate_all
+from photos.models import Album
+
+# Maximum SQL queries per public endpoint, regardless of how many rows it
+# returns; each includes the aggregate query behind ETag / Last-Modified
+# (enforced by photos.tests.test_query_budget; this command checks a real database)
+BUDGETS = {
+    "category-list": 2,
+    "home": 2,
+    "album-list": 2,
+    "album-list-by-category": 2,
+    "album-detail": 3,
+    "album-photos": 3,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every public API endpoint against the current database and "
+        "fail if any of them runs more SQL queries than its budget "
+        "(invalidates the API response cache first)"
+    )
+
+    def handle(self, *args, **options):
+        album = Album.objects.filter(is_published=True).select_related("category").first()
+        if album is None:
+            raise CommandError("Needs at least one published album to measure")
+
+        endpoints = {
+            "category-list": "/api/categories/",
+            "home": "/api/home/",
+            "album-list": "/api/albums/",
+            "album-list-by-category": f"/api/albums/?category={album.category.slug}",
+            "album-detail": f"/api/albums/{album.slug}/",
+            "album-photos": f"/api/albums/{album.slug}/photos/",
+        }
+
+        # Measure the rendering path, not the response cache
+        invalidate_all()
+
+        setup_test_environment()
+        try:
+            client = Client()
+            over = []
+            for name, url in endpoints.items():
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+
+                count, budget = len(queries), BUDGETS[name]
+                line = f"{name:<24} {count:>3} / {budget} queries  {url}"
+                if count > budget:
+                    over.append(name)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+        finally:
+            teardown_test_environment()
+
+        if over:
+            raise CommandError(f"Over query budget: {', '.join(over)}")
+        self.stdout.write(self.style.SUCCESS("All endpoints within budget"))
@@ -0,0 +1,57 @@
+from PIL import Image, ImageOps
+from django.core.management.base import BaseCommand
+from photos.caching import invalidate_all
+from photos.models import Album, Category, CategoryCover, Photo
+from photos.placeholders import COLOR_SAMPLE, image_placeholders
+from photos.utils import prepare_draft
+
+
+def stored_placeholders(field_file):
+    """(blurhash, colour) of a stored image, decoded at the smallest JPEG scale that will do"""
+    with field_file.storage.open(field_file.name, "rb") as f:
+        img = Image.open(f)
+        prepare_draft(img, (COLOR_SAMPLE, COLOR_SAMPLE))
+        img = ImageOps.exif_transpose(img)
+        return image_placeholders(img)
+
+
+class Command(BaseCommand):
+    help = "Compute BlurHash / dominant colour placeholders for images processed before they existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute placeholders even for images that already have them",
+        )
+
+    def handle(self, *args, **options):
+        targets = [
+            (Photo.objects.exclude(image=""), "image", "blurhash", "color"),
+            (Album.objects.exclude(cover="").exclude(cover__isnull=True), "cover", "cover_blurhash", "cover_color"),
+            (CategoryCover.objects.exclude(image=""), "image", "blurhash", "color"),
+        ]
+
+        for queryset, field_name, blurhash_attr, color_attr in targets:
+            if not options["force"]:
+                queryset = queryset.filter(**{blurhash_attr: ""})
+
+            done = 0
+            for obj in queryset.iterator():
+                try:
+                    blurhash, color = stored_placeholders(getattr(obj, field_name))
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f"{queryset.model.__name__} #{obj.pk}: {e}")
+                    continue
+                queryset.model.objects.filter(pk=obj.pk).update(
+                    **{blurhash_attr: blurhash, color_attr: color}
+                )
+                done += 1
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{queryset.model.__name__}: {done} placeholders generated"
+            ))
+
+        # Categories copy their cover's placeholder; responses embed them all
+        Category.refresh_summaries()
+        invalidate_all()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from photos.models import Album, Photo, CategoryCover
+from photos.utils import generate_renditions
+
+
+class Command(BaseCommand):
+    help = "Generate resized renditions for images uploaded before renditions existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate renditions even for images that already have them",
+        )
+
+    def handle(self, *args, **options):
+        targets = [
+            (Photo.objects.exclude(image=""), "image", "renditions"),
+            (Album.objects.exclude(cover="").exclude(cover__isnull=True), "cover", "cover_renditions"),
+            (CategoryCover.objects.exclude(image=""), "image", "renditions"),
+        ]
+
+        for queryset, field_name, renditions_attr in targets:
+            if not options["force"]:
+                queryset = queryset.filter(**{renditions_attr: {}})
+
+            done = 0
+            for obj in queryset.iterator():
+                try:
+                    renditions = generate_renditions(getattr(obj, field_name))
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f"{queryset.model.__name__} #{obj.pk}: {e}")
+                    continue
+                queryset.model.objects.filter(pk=obj.pk).update(**{renditions_attr: renditions})
+                done += 1
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{queryset.model.__name__}: {done} renditions generated"
+            ))
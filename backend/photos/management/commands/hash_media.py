@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from photos.caching import invalidate_all
+from photos.models import Album, Category, CategoryCover, ImageJob, Photo
+from photos.storage import BLOB_PREFIX, release_files, rendition_files
+from photos.utils import rendition_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Move images stored before content-addressed storage into blobs/ "
+        "(renditions included), deduplicating identical files"
+    )
+
+    def handle(self, *args, **options):
+        targets = [
+            (Photo, "image", "renditions"),
+            (Album, "cover", "cover_renditions"),
+            (CategoryCover, "image", "renditions"),
+        ]
+        # Their jobs still point at the raw upload; the worker stores them as blobs anyway
+        queued = set(
+            ImageJob.objects.filter(status__in=[ImageJob.Status.PENDING, ImageJob.Status.RUNNING])
+            .values_list("source_name", flat=True)
+        )
+
+        for model, field_name, renditions_attr in targets:
+            moved = 0
+            queryset = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{f"{field_name}__startswith": BLOB_PREFIX + "/"})
+            )
+            for obj in queryset.iterator():
+                field_file = getattr(obj, field_name)
+                if field_file.name in queued:
+                    continue
+                try:
+                    name, renditions = self.hash_image(field_file, getattr(obj, renditions_attr))
+                except OSError as e:
+                    self.stderr.write(f"{model.__name__} #{obj.pk}: {e}")
+                    continue
+
+                # .update() so no image job is queued; skipped if the image changed meanwhile
+                updated = model.objects.filter(pk=obj.pk, **{field_name: field_file.name}).update(
+                    **{field_name: name, renditions_attr: renditions}
+                )
+                if updated:
+                    release_files(field_file.storage, [
+                        field_file.name, *rendition_files(getattr(obj, renditions_attr))
+                    ])
+                    moved += 1
+
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {moved} images moved to blobs/"))
+
+        # Category covers and every API response may point at the old names
+        Category.refresh_summaries()
+        invalidate_all()
+
+    def hash_image(self, field_file, renditions):
+        storage = field_file.storage
+        with storage.open(field_file.name, "rb") as f:
+            name = storage.save(field_file.name, f)
+
+        hashed = {}
+        for width, rendition in (renditions or {}).items():
+            if rendition["name"] == field_file.name:
+                hashed[width] = {**rendition, "name": name}
+                continue
+            with storage.open(rendition["name"], "rb") as f:
+                hashed[width] = {**rendition, "name": storage.save(rendition_name(name, int(width)), f)}
+        return name, hashed
@@ -0,0 +1,92 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from photos.jobs import claim_jobs, queue_stats, run_batch
+from photos.utils import limit_worker_memory
+
+
+class Command(BaseCommand):
+    help = "Run the background worker that compresses uploads and generates renditions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print queue depth and image-memory admission state, then exit",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.IMAGE_WORKER_PROCESSES,
+            help="Decode/encode images in this many child processes (1 = inline)",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for key, value in queue_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        processes = max(1, options["processes"])
+        limits = (settings.IMAGE_WORKER_MEMORY_LIMIT, settings.IMAGE_MAX_PIXELS)
+        if processes > 1:
+            # Don't let forked children inherit an open database socket
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=limit_worker_memory,
+                initargs=limits,
+            )
+        else:
+            # Inline mode: the limits apply to this process
+            limit_worker_memory(*limits)
+            executor = None
+
+        self.stdout.write(f"Image job worker started ({processes} process(es))")
+        processed = failed = 0
+
+        try:
+            while not self._stopping:
+                close_old_connections()
+                # One job per child keeps every core busy without hoarding
+                # jobs other worker containers could pick up
+                jobs = claim_jobs(limit=processes)
+
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                done, errors = run_batch(jobs, executor)
+                processed += done
+                failed += errors
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Image job worker stopped: {processed} done, {failed} failed"
+        ))
+
+    def _stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,29 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from photos.models import UploadSession
+from photos.resumable import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads past UPLOAD_SESSION_TTL and staged files no upload owns"
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+
+        # Staged bytes left behind by sessions deleted some other way (e.g. with their album)
+        orphans = 0
+        if os.path.isdir(settings.UPLOAD_STAGING_DIR):
+            # Younger files may belong to a session created after the query below
+            cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+            live = {f"{pk}.part" for pk in UploadSession.objects.values_list("pk", flat=True)}
+            for entry in os.scandir(settings.UPLOAD_STAGING_DIR):
+                if entry.name.endswith(".part") and entry.name not in live and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{purged} expired uploads purged, {orphans} orphaned staging files removed"
+        ))
@@ -0,0 +1,47 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from photos.storage import BLOB_PREFIX, LOCK_DIR, release_files
+
+# Names checked against the tables per query
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete blobs no row references that are older than MEDIA_RELEASE_GRACE, "
+        "and temp files left by interrupted saves"
+    )
+
+    def handle(self, *args, **options):
+        root = os.path.join(default_storage.location, BLOB_PREFIX)
+        cutoff = time.time() - settings.MEDIA_RELEASE_GRACE
+        candidates = []
+        stale = 0
+        for directory, subdirs, files in os.walk(root):
+            if LOCK_DIR in subdirs:
+                subdirs.remove(LOCK_DIR)
+            for filename in files:
+                path = os.path.join(directory, filename)
+                try:
+                    if os.stat(path).st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if filename.endswith(".tmp"):
+                    os.remove(path)
+                    stale += 1
+                else:
+                    candidates.append(os.path.relpath(path, default_storage.location).replace(os.sep, "/"))
+
+        before = len(candidates)
+        for start in range(0, len(candidates), BATCH_SIZE):
+            release_files(default_storage, candidates[start:start + BATCH_SIZE])
+        removed = sum(not default_storage.exists(name) for name in candidates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{removed} of {before} old blobs were unreferenced and removed, {stale} temp files removed"
+        ))
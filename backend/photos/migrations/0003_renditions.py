@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-03-02 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0002_categorycover'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='cover_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Auto-generated resized copies of the cover, keyed by width'),
+        ),
+        migrations.AddField(
+            model_name='categorycover',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Auto-generated resized copies, keyed by width'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Auto-generated resized copies, keyed by width'),
+        ),
+    ]
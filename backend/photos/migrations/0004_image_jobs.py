@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-03-09 11:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0003_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'În așteptare'), ('processing', 'În procesare'), ('ready', 'Gata'), ('failed', 'Eșuat')], default='ready', editable=False, help_text='Compression / renditions status, set by the image job worker', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('photo', 'Fotografie'), ('album_cover', 'Copertă album'), ('category_cover', 'Copertă categorie')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('source_name', models.CharField(help_text='Stored file name the job was created for; stale jobs are skipped', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'În așteptare'), ('running', 'În procesare'), ('done', 'Finalizat'), ('failed', 'Eșuat')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job procesare imagine',
+                'verbose_name_plural': 'Joburi procesare imagini',
+                'db_table': 'image_job',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='image_job_status_14a812_idx'), models.Index(fields=['kind', 'object_id'], name='image_job_kind_7ec834_idx')],
+            },
+        ),
+    ]
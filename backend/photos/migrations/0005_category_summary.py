@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-03-16 10:42
+
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    # Same resolution as Category.resolve_cover (model methods aren't available here)
+    Category = apps.get_model('photos', 'Category')
+    Album = apps.get_model('photos', 'Album')
+    CategoryCover = apps.get_model('photos', 'CategoryCover')
+
+    for category in Category.objects.all():
+        albums = Album.objects.filter(category=category, is_published=True)
+        cover = (
+            CategoryCover.objects.filter(category=category, is_active=True)
+            .order_by('-order', '-created_at')
+            .first()
+        )
+        first_album = albums.order_by('order', '-date').first()
+        if cover and cover.image:
+            category.cover_path, category.cover_renditions = cover.image.name, cover.renditions
+        elif first_album and first_album.cover:
+            category.cover_path, category.cover_renditions = first_album.cover.name, first_album.cover_renditions
+        category.published_album_count = albums.count()
+        category.save(update_fields=['cover_path', 'cover_renditions', 'published_album_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0004_image_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='cover_path',
+            field=models.CharField(blank=True, editable=False, help_text='Coperta afișată: ultima copertă activă sau coperta primului album publicat', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='cover_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Auto-generated resized copies of the cover, keyed by width'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_album_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Numărul de albume publicate'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
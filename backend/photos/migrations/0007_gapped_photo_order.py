@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-03-23 11:20
+
+from django.db import migrations
+from django.db.models import Case, PositiveIntegerField, Value, When
+
+# Same spacing as photos.ordering.ORDER_GAP at the time of writing
+ORDER_GAP = 1024
+
+
+def spread_photo_order(apps, schema_editor):
+    Album = apps.get_model('photos', 'Album')
+    Photo = apps.get_model('photos', 'Photo')
+
+    for album_id in Album.objects.values_list('pk', flat=True):
+        ids = list(
+            Photo.objects.filter(album_id=album_id)
+            .order_by('order', 'uploaded_at', 'id')
+            .values_list('pk', flat=True)
+        )
+        if ids:
+            Photo.objects.filter(pk__in=ids).update(order=Case(
+                *[When(pk=pk, then=Value((i + 1) * ORDER_GAP)) for i, pk in enumerate(ids)],
+                output_field=PositiveIntegerField(),
+            ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0006_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_photo_order, migrations.RunPython.noop),
+    ]
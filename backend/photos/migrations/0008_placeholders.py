@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-03-25 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0007_gapped_photo_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='cover_blurhash',
+            field=models.CharField(blank=True, editable=False, help_text='BlurHash placeholder of the cover, auto-generated on upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='cover_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the cover (#rrggbb), auto-generated on upload', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='cover_blurhash',
+            field=models.CharField(blank=True, editable=False, help_text='BlurHash placeholder of the cover, auto-generated on upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='cover_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the cover (#rrggbb), auto-generated on upload', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='categorycover',
+            name='blurhash',
+            field=models.CharField(blank=True, editable=False, help_text='BlurHash placeholder of the image, auto-generated on upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='categorycover',
+            name='color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image (#rrggbb), auto-generated on upload', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='blurhash',
+            field=models.CharField(blank=True, editable=False, help_text='BlurHash placeholder of the photo, auto-generated on upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the photo (#rrggbb), auto-generated on upload', max_length=7),
+        ),
+    ]
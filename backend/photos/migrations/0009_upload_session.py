@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-03-27 10:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0008_placeholders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('caption', models.CharField(blank=True, max_length=255)),
+                ('length', models.PositiveBigIntegerField(help_text='Total size of the file in bytes')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Bytes received so far')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('album', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='photos.album')),
+                ('photo', models.ForeignKey(blank=True, help_text='The photo created once the upload completed', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='photos.photo')),
+            ],
+            options={
+                'verbose_name': 'Sesiune upload',
+                'verbose_name_plural': 'Sesiuni upload',
+                'db_table': 'upload_session',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -1,18 +1,28 @@
-from django.db import models
+import uuid
+
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
-from PIL import Image as PilImage
-import os
+from .storage import release_files_on_commit, rendition_files
+from .tracking import ChangeTrackingMixin
+
+
+# Also the largest resumable upload accepted (photos.resumable)
+MAX_IMAGE_SIZE = 20 * 1024 * 1024
 
 
 def validate_image_size(image):
     """Max 20MB per image"""
-    max_size = 20 * 1024 * 1024
+    max_size = MAX_IMAGE_SIZE
     if image.size > max_size:
         raise ValidationError(f"Imaginea nu poate depăși 20MB. Dimensiunea curentă: {image.size / 1024 / 1024:.1f}MB")
 
 
+# With the content-addressed default storage (photos.storage) these only
+# decide the extension; files are stored under the hash of their bytes
 def album_cover_path(instance, filename):
     ext = filename.rsplit('.', 1)[-1].lower()
     return f'albums/{instance.slug}/cover/cover.{ext}'
@@ -46,6 +56,38 @@ class Category(models.Model):
         help_text="Dezactivează pentru a ascunde categoria din site"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized by Category.refresh_summaries so the public API reads one table
+    cover_path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Coperta afișată: ultima copertă activă sau coperta primului album publicat"
+    )
+    cover_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Auto-generated resized copies of the cover, keyed by width"
+    )
+    cover_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="BlurHash placeholder of the cover, auto-generated on upload"
+    )
+    cover_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Dominant colour of the cover (#rrggbb), auto-generated on upload"
+    )
+    published_album_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Numărul de albume publicate"
+    )
 
     class Meta:
         verbose_name = "Categorie"
@@ -61,23 +103,68 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-    @property
-    def published_album_count(self):
-        return self.albums.filter(is_published=True).count()
-
-    @property
-    def cover_url(self):
-        """Get the latest category cover or fallback to first album cover"""
+    def resolve_cover(self):
+        """
+        Latest category cover or fallback to first album cover, as
+        (file, renditions, blurhash, colour)
+        """
         cover = self.covers.filter(is_active=True).order_by('-order', '-created_at').first()
         if cover and cover.image:
-            return cover.image.url
+            return cover.image, cover.renditions, cover.blurhash, cover.color
         # Fallback to first published album cover
         first_album = self.albums.filter(is_published=True).first()
         if first_album and first_album.cover:
-            return first_album.cover.url
-        return None
-        
-class Album(models.Model):
+            return (
+                first_album.cover, first_album.cover_renditions,
+                first_album.cover_blurhash, first_album.cover_color,
+            )
+        return None, {}, '', ''
+
+    @classmethod
+    def refresh_summaries(cls, pks=None):
+        """
+        Recompute the denormalized cover and album count of the given
+        categories (all of them when ``pks`` is None). Called from the
+        Album / CategoryCover signals, the image worker and admin reorders.
+        """
+        with transaction.atomic():
+            queryset = cls.objects.select_for_update().order_by('pk')
+            if pks is not None:
+                queryset = queryset.filter(pk__in=[pk for pk in pks if pk])
+
+            changed = []
+            for category in queryset:
+                image, renditions, blurhash, color = category.resolve_cover()
+                summary = {
+                    'cover_path': image.name if image else '',
+                    'cover_renditions': renditions,
+                    'cover_blurhash': blurhash,
+                    'cover_color': color,
+                    'published_album_count': category.albums.filter(is_published=True).count(),
+                }
+                if any(getattr(category, k) != v for k, v in summary.items()):
+                    for k, v in summary.items():
+                        setattr(category, k, v)
+                    # bulk_update doesn't apply auto_now
+                    category.updated_at = timezone.now()
+                    changed.append(category)
+
+            cls.objects.bulk_update(
+                changed, [
+                    'cover_path', 'cover_renditions', 'cover_blurhash', 'cover_color',
+                    'published_album_count', 'updated_at',
+                ]
+            )
+
+    @property
+    def cover_url(self):
+        """Get the latest category cover or fallback to first album cover"""
+        return default_storage.url(self.cover_path) if self.cover_path else None
+
+class Album(ChangeTrackingMixin, models.Model):
+    # Compared by the pre_save receivers in signals.py
+    tracked_fields = ("category", "slug", "cover")
+
     name = models.CharField(
         max_length=200,
         help_text="Ex: Andrei & Maria, Botez Sofia"
@@ -116,6 +203,24 @@ class Album(models.Model):
         ],
         help_text="Fotografia de copertă a albumului (max 20MB)"
     )
+    cover_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Auto-generated resized copies of the cover, keyed by width"
+    )
+    cover_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="BlurHash placeholder of the cover, auto-generated on upload"
+    )
+    cover_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Dominant colour of the cover (#rrggbb), auto-generated on upload"
+    )
 
     meta_title = models.CharField(
         max_length=60,
@@ -166,21 +271,28 @@ class Album(models.Model):
         return f"{self.category} | {self.name} ({self.date.year})"
 
     def delete(self, *args, **kwargs):
-        """Delete cover image file when album is deleted"""
+        """Delete cover image files when album is deleted (unless another row shares them)"""
+        result = super().delete(*args, **kwargs)
         if self.cover:
-            if os.path.isfile(self.cover.path):
-                os.remove(self.cover.path)
-        super().delete(*args, **kwargs)
+            release_files_on_commit(self.cover.storage, [self.cover.name, *rendition_files(self.cover_renditions)])
+        return result
 
     @property
     def photo_count(self):
+        # AlbumViewSet annotates the count; fall back to a query elsewhere
+        if hasattr(self, '_photo_count'):
+            return self._photo_count
         return self.photos.count()
 
+    @photo_count.setter
+    def photo_count(self, value):
+        self._photo_count = value
+
     @property
     def cover_url(self):
         if self.cover:
             return self.cover.url
-        first_photo = self.photos.first()
+        first_photo = self.photos.filter(processing_status=Photo.ProcessingStatus.READY).first()
         if first_photo:
             return first_photo.image.url
         return None
@@ -194,7 +306,16 @@ class Album(models.Model):
         return self.meta_description or self.description[:160] or f"Album foto {self.name}"
 
 
-class Photo(models.Model):
+class Photo(ChangeTrackingMixin, models.Model):
+    # Compared by the pre_save receivers in signals.py
+    tracked_fields = ("image",)
+
+    class ProcessingStatus(models.TextChoices):
+        PENDING = "pending", "În așteptare"
+        PROCESSING = "processing", "În procesare"
+        READY = "ready", "Gata"
+        FAILED = "failed", "Eșuat"
+
     album = models.ForeignKey(
         Album,
         on_delete=models.CASCADE,
@@ -247,6 +368,31 @@ class Photo(models.Model):
         editable=False,
         help_text="File size in bytes, auto-populated on upload"
     )
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Auto-generated resized copies, keyed by width"
+    )
+    blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="BlurHash placeholder of the photo, auto-generated on upload"
+    )
+    color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Dominant colour of the photo (#rrggbb), auto-generated on upload"
+    )
+    processing_status = models.CharField(
+        max_length=20,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.READY,
+        editable=False,
+        help_text="Compression / renditions status, set by the image job worker"
+    )
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -261,31 +407,35 @@ class Photo(models.Model):
         ]
 
     def save(self, *args, **kwargs):
-        if self.image and not self.width:
-            try:
-                img = PilImage.open(self.image)
-                self.width, self.height = img.size
-                self.file_size = self.image.size
-            except Exception:
-                pass
-
+        # width/height/file_size are filled by the image job worker
+        # (photos.jobs) from the same decode that produces the stored file
         if not self.alt_text:
-            self.alt_text = f"Fotografie {self.order + 1} din albumul {self.album.name}"
+            self.alt_text = self.default_alt_text()
 
         super().save(*args, **kwargs)
 
+    def default_alt_text(self):
+        from .ordering import ORDER_GAP
+
+        # Orders are spaced ORDER_GAP apart (photos.ordering)
+        position = max(self.order // ORDER_GAP, 1)
+        return f"Fotografie {position} din albumul {self.album.name}"
+
     def delete(self, *args, **kwargs):
-        """Delete image file from disk when photo is deleted"""
+        """Delete image files when photo is deleted (unless another row shares them)"""
+        result = super().delete(*args, **kwargs)
         if self.image:
-            if os.path.isfile(self.image.path):
-                os.remove(self.image.path)
-        super().delete(*args, **kwargs)
+            release_files_on_commit(self.image.storage, [self.image.name, *rendition_files(self.renditions)])
+        return result
 
     def __str__(self):
         return f"#{self.order} — {self.album.name}"
 
 
-class CategoryCover(models.Model):
+class CategoryCover(ChangeTrackingMixin, models.Model):
+    # Compared by the pre_save receivers in signals.py
+    tracked_fields = ("category", "image")
+
     category = models.ForeignKey(
         Category,
         on_delete=models.CASCADE,
@@ -314,6 +464,24 @@ class CategoryCover(models.Model):
         default=True,
         help_text="Bifați pentru a activa această copertă"
     )
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Auto-generated resized copies, keyed by width"
+    )
+    blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="BlurHash placeholder of the image, auto-generated on upload"
+    )
+    color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Dominant colour of the image (#rrggbb), auto-generated on upload"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -330,7 +498,100 @@ class CategoryCover(models.Model):
         return f"{self.category.name} - Copertă {self.order}"
 
     def delete(self, *args, **kwargs):
-        """Delete image file when cover is deleted"""
-        if self.image and os.path.isfile(self.image.path):
-            os.remove(self.image.path)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        """Delete image files when cover is deleted (unless another row shares them)"""
+        result = super().delete(*args, **kwargs)
+        if self.image:
+            release_files_on_commit(self.image.storage, [self.image.name, *rendition_files(self.renditions)])
+        return result
+
+
+class ImageJob(models.Model):
+    """
+    Durable queue entry for image work (compression, metadata, renditions).
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED by the
+    `process_image_jobs` management command.
+    """
+
+    class Kind(models.TextChoices):
+        PHOTO = "photo", "Fotografie"
+        ALBUM_COVER = "album_cover", "Copertă album"
+        CATEGORY_COVER = "category_cover", "Copertă categorie"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "În așteptare"
+        RUNNING = "running", "În procesare"
+        DONE = "done", "Finalizat"
+        FAILED = "failed", "Eșuat"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    source_name = models.CharField(
+        max_length=255,
+        help_text="Stored file name the job was created for; stale jobs are skipped"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Job procesare imagine"
+        verbose_name_plural = "Joburi procesare imagini"
+        db_table = "image_job"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["kind", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress (photos.resumable): the bytes received so
+    far live in a staging file, ``offset`` long. When ``offset`` reaches
+    ``length`` the file becomes a Photo of ``album`` and ``photo`` is set.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    album = models.ForeignKey(
+        Album,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    caption = models.CharField(max_length=255, blank=True)
+    length = models.PositiveBigIntegerField(help_text="Total size of the file in bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    photo = models.ForeignKey(
+        Photo,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="The photo created once the upload completed"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Sesiune upload"
+        verbose_name_plural = "Sesiuni upload"
+        db_table = "upload_session"
+        ordering = ["created_at"]
+
+    @property
+    def is_complete(self):
+        return self.photo_id is not None
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
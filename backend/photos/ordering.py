@@ -0,0 +1,104 @@
+"""
+Gapped ordering for photos within an album.
+
+Photo.order values are spaced ORDER_GAP apart, so moving a photo between
+two neighbours only rewrites that photo's order (the midpoint of theirs).
+When two neighbours end up adjacent the album is renumbered in a single
+CASE statement and the move proceeds. Full-list reorders (the API's
+``reorder`` action) are written the same way, one statement per album.
+"""
+from django.db import transaction
+from django.db.models import Case, Max, PositiveIntegerField, Q, Value, When
+
+from .caching import invalidate_albums
+from .models import Album, Photo
+
+ORDER_GAP = 1024
+
+
+def next_order(album_id, count=1):
+    """``count`` gapped orders after the last photo of the album"""
+    last = Photo.objects.filter(album_id=album_id).aggregate(last=Max("order"))["last"] or 0
+    return [last + ORDER_GAP * (i + 1) for i in range(count)]
+
+
+def _renumber(ids):
+    """Set order = (position + 1) * ORDER_GAP for ``ids`` in one UPDATE"""
+    if not ids:
+        return 0
+    return Photo.objects.filter(pk__in=ids).update(order=Case(
+        *[When(pk=pk, then=Value((i + 1) * ORDER_GAP)) for i, pk in enumerate(ids)],
+        output_field=PositiveIntegerField(),
+    ))
+
+
+def rebalance_album(album_id):
+    """Spread the album's current order evenly, keeping its sequence"""
+    ids = list(
+        Photo.objects.filter(album_id=album_id)
+        .order_by("order", "id")
+        .values_list("pk", flat=True)
+    )
+    return _renumber(ids)
+
+
+def lock_album(album_id):
+    # Serializes order changes (and uploads, photos.services) within one album
+    Album.objects.select_for_update().filter(pk=album_id).values_list("pk", flat=True).first()
+
+
+@transaction.atomic
+def reorder_photos(album_id, photo_ids):
+    """
+    Put ``photo_ids`` first, in that sequence, followed by any photos of the
+    album not listed (in their current order). Ids of other albums are ignored.
+    """
+    lock_album(album_id)
+    current = list(
+        Photo.objects.filter(album_id=album_id)
+        .order_by("order", "id")
+        .values_list("pk", flat=True)
+    )
+    known = set(current)
+    listed = list(dict.fromkeys(pk for pk in photo_ids if pk in known))
+    listed_set = set(listed)
+    updated = _renumber(listed + [pk for pk in current if pk not in listed_set])
+    invalidate_albums([album_id])
+    return updated
+
+
+@transaction.atomic
+def move_photo(photo, before=None):
+    """
+    Move ``photo`` right before ``before`` (a photo of the same album), or
+    to the end of the album when ``before`` is None. Updates one row unless
+    the gap in front of ``before`` is used up.
+    """
+    album_id = photo.album_id
+    lock_album(album_id)
+    photos = Photo.objects.filter(album_id=album_id).exclude(pk=photo.pk)
+
+    if before is None:
+        photo.order = next_order(album_id)[0]
+    else:
+        if before.album_id != album_id:
+            raise ValueError("Photos belong to different albums")
+        if before.pk == photo.pk:
+            return photo
+        for attempt in range(2):
+            target = Photo.objects.filter(pk=before.pk).values_list("order", flat=True).get()
+            low = (
+                photos.filter(Q(order__lt=target) | Q(order=target, pk__lt=before.pk))
+                .order_by("-order", "-pk")
+                .values_list("order", flat=True)
+                .first()
+            )
+            low = 0 if low is None else low
+            if target - low >= 2:
+                break
+            rebalance_album(album_id)
+        photo.order = (low + target) // 2
+
+    Photo.objects.filter(pk=photo.pk).update(order=photo.order)
+    invalidate_albums([album_id])
+    return photo
@@ -0,0 +1,228 @@
+"""
+On-demand resized copies of stored images: /img/<w>x<h>/<name>.
+
+Only the sizes in settings.RESIZE_SIZES are served. A variant is rendered
+from the stored file the first time it is asked for, with the same engine
+as ingest (utils.decode_fitted) and under the same image-memory admission
+control, then kept in a disk cache limited to RESIZE_CACHE_MAX_BYTES: when
+it grows past that, the least recently used variants are deleted.
+Variants on disk are sent by the front server (X-Accel-Redirect) when
+RESIZE_ACCEL_REDIRECT_PREFIX is configured.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from PIL import Image, UnidentifiedImageError
+
+from .admission import AdmissionRejected, estimate_decode_bytes, get_controller
+from .storage import is_blob
+from .utils import decode_fitted
+
+QUALITY = 82
+
+# A hit refreshes the variant's position in the LRU at most this often
+TOUCH_INTERVAL = 60
+
+# Eviction trims the cache to this fraction of the budget, so it doesn't run on every write
+EVICT_TO = 0.9
+
+
+class ResizeCache:
+    """
+    Variants on disk as <directory>/ab/<key>.jpg. File mtimes order the LRU;
+    the running total lives in a small JSON ledger guarded by flock, so
+    every process sharing the directory sees the same budget.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.jpg")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            modified = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - modified > TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                # Evicted in the meantime
+                return None
+        return path
+
+    def put(self, key, render):
+        """Store what ``render(file)`` writes under ``key``; returns the path"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as f:
+            try:
+                render(f)
+            except Exception:
+                f.close()
+                os.remove(f.name)
+                raise
+            size = f.tell()
+        os.replace(f.name, path)
+        self._account(size)
+        return path
+
+    @contextmanager
+    def _ledger(self):
+        os.makedirs(self.directory, exist_ok=True)
+        ledger_path = os.path.join(self.directory, "usage.json")
+        with open(os.path.join(self.directory, "usage.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(ledger_path) as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {"bytes": self.scan_total()}
+
+                yield state
+
+                tmp = f"{ledger_path}.{os.getpid()}"
+                with open(tmp, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, ledger_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _account(self, size):
+        with self._ledger() as state:
+            state["bytes"] += size
+            if state["bytes"] > self.max_bytes:
+                state["bytes"] = self.evict(int(self.max_bytes * EVICT_TO))
+
+    def _variants(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                for variant in os.scandir(entry.path):
+                    if variant.name.endswith(".jpg"):
+                        yield variant
+
+    def scan_total(self):
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(variant.stat().st_size for variant in self._variants())
+
+    def evict(self, target):
+        """Delete least recently used variants until at most ``target`` bytes remain"""
+        variants = []
+        for variant in self._variants():
+            try:
+                stat = variant.stat()
+            except FileNotFoundError:
+                continue
+            variants.append((stat.st_mtime, stat.st_size, variant.path))
+        total = sum(size for _, size, _ in variants)
+        for _, size, path in sorted(variants):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+def get_cache():
+    return ResizeCache(settings.RESIZE_CACHE_DIR, settings.RESIZE_CACHE_MAX_BYTES)
+
+
+def resized_url(name, size):
+    """URL of the ``size`` variant (one of RESIZE_SIZES) of a stored file"""
+    if not name:
+        return None
+    return reverse("media-resized", kwargs={"width": size[0], "height": size[1], "path": name})
+
+
+def variant_key(name, size, modified):
+    # Blobs never change; other names are keyed by their mtime as well
+    version = "" if is_blob(name) else str(modified)
+    raw = f"{size[0]}x{size[1]}|{name}|{version}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def render_variant(source, size, out):
+    img = decode_fitted(source, *size)
+    img.save(out, format="JPEG", quality=QUALITY, optimize=True, progressive=True)
+
+
+def _open(path):
+    try:
+        return open(path, "rb") if path else None
+    except FileNotFoundError:
+        # Evicted between lookup and open
+        return None
+
+
+def _variant_response(cache, variant):
+    """The variant file, via the front server when RESIZE_ACCEL_REDIRECT_PREFIX is set"""
+    prefix = settings.RESIZE_ACCEL_REDIRECT_PREFIX
+    if not prefix:
+        return FileResponse(variant, content_type="image/jpeg")
+    variant.close()
+    response = HttpResponse(content_type="image/jpeg")
+    relative = os.path.relpath(variant.name, cache.directory).replace(os.sep, "/")
+    response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + relative
+    return response
+
+
+def serve_resized(request, name, size, storage=default_storage):
+    """Response for the ``size`` variant of the stored file ``name``"""
+    try:
+        if not storage.exists(name):
+            raise Http404("No such image")
+        modified = None if is_blob(name) else storage.get_modified_time(name).timestamp()
+        # Rendered from the local file (the default storage is on disk)
+        source = storage.path(name)
+    except (SuspiciousFileOperation, NotImplementedError):
+        raise Http404("No such image")
+
+    key = variant_key(name, size, modified)
+    etag = quote_etag(key[:32])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cache = get_cache()
+        variant = _open(cache.get(key))
+        if variant is None:
+            try:
+                cost = estimate_decode_bytes(source, *size)
+                admission = get_controller(timeout=settings.RESIZE_ADMISSION_TIMEOUT)
+                path = admission.call(cost, cache.put, key, lambda out: render_variant(source, size, out))
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+                # Also truncated or corrupt files, which Pillow reports as OSError / ValueError
+                raise Http404("Not an image")
+            except AdmissionRejected:
+                response = HttpResponse("Busy, retry later", status=503, content_type="text/plain")
+                response["Retry-After"] = "5"
+                return response
+            variant = open(path, "rb")
+        response = _variant_response(cache, variant)
+
+    response["ETag"] = etag
+    if is_blob(name):
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_BLOB_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.RESIZE_MAX_AGE)
+    return response
@@ -0,0 +1,206 @@
+"""
+Resumable uploads: the core, creation, checksum and termination parts of
+the tus 1.0 protocol (https://tus.io/protocols/resumable-upload).
+
+    POST   /api/albums/<slug>/uploads/   Upload-Length, Upload-Metadata -> 201, Location
+    HEAD   /api/uploads/<id>/            -> Upload-Offset, Upload-Length
+    PATCH  /api/uploads/<id>/            Upload-Offset, [Upload-Checksum], body: the next bytes
+    DELETE /api/uploads/<id>/            abandon the upload
+
+Each PATCH appends to one staging file in UPLOAD_STAGING_DIR. A client
+whose connection dropped asks HEAD for the offset and sends only the rest.
+When the last byte arrives the file goes through photos.services like any
+other upload.
+"""
+import base64
+import binascii
+import fcntl
+import hashlib
+import os
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import UploadSession
+from .services import upload_photos, validate_upload
+
+TUS_VERSION = "1.0.0"
+TUS_EXTENSIONS = "creation,checksum,termination"
+CHECKSUM_ALGORITHMS = ("sha1", "sha256", "md5")
+
+# Request bodies are copied to disk in blocks this size
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """A request the protocol rejects; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def staging_path(session):
+    return os.path.join(settings.UPLOAD_STAGING_DIR, f"{session.pk}.part")
+
+
+def parse_metadata(header):
+    """Upload-Metadata ("key base64value,key2 ...") as a dict of strings"""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in (header or "").split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode() if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(400, f"Invalid Upload-Metadata value for {key!r}")
+    return metadata
+
+
+def parse_checksum(header):
+    """Upload-Checksum ("<algorithm> <base64 digest>") as (hash object, expected digest)"""
+    if not header:
+        return None, None
+    algorithm, _, encoded = header.partition(" ")
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(400, f"Unsupported checksum algorithm {algorithm!r}")
+    try:
+        expected = base64.b64decode(encoded, validate=True)
+    except binascii.Error:
+        raise UploadError(400, "Invalid Upload-Checksum digest")
+    return hashlib.new(algorithm), expected
+
+
+def create_session(album, length, metadata):
+    """A new, empty upload of ``length`` bytes into ``album``"""
+    filename = os.path.basename(metadata.get("filename", ""))
+    if not filename:
+        raise UploadError(400, "Upload-Metadata must include a filename")
+
+    # Extension and size are checked before any byte is sent
+    validate_upload(SimpleNamespace(name=filename, size=length))
+
+    session = UploadSession.objects.create(
+        album=album,
+        filename=filename,
+        caption=metadata.get("caption", "")[:255],
+        length=length,
+        expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+    )
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    open(staging_path(session), "wb").close()
+    return session
+
+
+def append_chunk(session, offset, stream, content_length, checksum=None):
+    """
+    Write ``content_length`` bytes from ``stream`` at ``offset``, which must
+    be where the upload stands. With a checksum the chunk is all or nothing;
+    without one, whatever arrived before a dropped connection is kept.
+    Completes the upload when its last byte is in.
+    """
+    if session.is_complete:
+        raise UploadError(403, "Upload already completed")
+    if content_length > settings.UPLOAD_CHUNK_MAX_BYTES:
+        raise UploadError(413, f"Chunks are limited to {settings.UPLOAD_CHUNK_MAX_BYTES} bytes")
+    if offset + content_length > session.length:
+        raise UploadError(413, "Chunk extends past Upload-Length")
+    digest, expected = parse_checksum(checksum)
+
+    try:
+        f = open(staging_path(session), "r+b")
+    except FileNotFoundError:
+        raise UploadError(410, "Upload expired")
+    with f:
+        # One writer per upload; a second PATCH is told to retry instead of waiting
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError(423, "Another request is writing to this upload")
+
+        # The previous writer may have moved the offset while this one waited to get here
+        session.refresh_from_db(fields=["offset", "photo"])
+        if offset != session.offset:
+            raise UploadError(409, f"Upload-Offset must be {session.offset}")
+
+        # Drop anything a failed request left past the recorded offset
+        f.seek(offset)
+        f.truncate()
+        received = 0
+        while received < content_length:
+            try:
+                data = stream.read(min(READ_SIZE, content_length - received))
+            except OSError:
+                break
+            if not data:
+                break
+            f.write(data)
+            if digest:
+                digest.update(data)
+            received += len(data)
+
+        if digest and (received != content_length or digest.digest() != expected):
+            f.truncate(offset)
+            # 460 Checksum Mismatch is the tus checksum extension's status
+            raise UploadError(460, "Checksum mismatch")
+        f.flush()
+        os.fsync(f.fileno())
+
+        if offset + received == session.length:
+            # Saves the final offset together with the photo
+            complete(session, f)
+        else:
+            UploadSession.objects.filter(pk=session.pk).update(offset=offset + received)
+        session.offset = offset + received
+    return session
+
+
+def complete(session, f):
+    """
+    Send the staged file to the Photo ingest and drop the staging copy. The
+    final offset is saved in the same transaction as the photo: if the
+    ingest fails, the upload stays at its previous offset and the client
+    can send the last chunk again.
+    """
+    f.seek(0)
+    try:
+        # Header only: the image job does the full decode
+        Image.open(f)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        discard(session)
+        raise UploadError(415, "Not an image")
+
+    f.seek(0)
+    with transaction.atomic():
+        photo = upload_photos(session.album, [File(f, name=session.filename)], caption=session.caption)[0]
+        UploadSession.objects.filter(pk=session.pk).update(offset=session.length, photo=photo)
+    session.photo = photo
+    _remove(staging_path(session))
+
+
+def discard(session):
+    """Forget an upload and its staged bytes"""
+    _remove(staging_path(session))
+    session.delete()
+
+
+def purge_expired(now=None):
+    """Discard uploads past their expiry; returns how many"""
+    expired = UploadSession.objects.filter(expires_at__lt=now or timezone.now())
+    count = 0
+    for session in expired.iterator():
+        discard(session)
+        count += 1
+    return count
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
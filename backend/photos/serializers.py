@@ -1,14 +1,33 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import Category, Album, CategoryCover, Photo
 
 
+def rendition_urls(request, renditions):
+    """{"320": {"name", "width", "height"}} -> {"320": {"url", "width", "height"}}"""
+    if not renditions or not request:
+        return {}
+    return {
+        width: {
+            'url': request.build_absolute_uri(default_storage.url(r['name'])),
+            'width': r['width'],
+            'height': r['height'],
+        }
+        for width, r in sorted(renditions.items(), key=lambda item: int(item[0]))
+    }
+
+
 class PhotoSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Photo
-        fields = ['id', 'image', 'image_url', 'caption', 'order', 'uploaded_at']
-        read_only_fields = ['uploaded_at']
+        fields = [
+            'id', 'image', 'image_url', 'renditions', 'width', 'height',
+            'blurhash', 'color', 'caption', 'order', 'processing_status', 'uploaded_at'
+        ]
+        read_only_fields = ['processing_status', 'uploaded_at']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -16,6 +35,9 @@ class PhotoSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_renditions(self, obj):
+        return rendition_urls(self.context.get('request'), obj.renditions)
+
 
 class PhotoUploadSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,6 +47,7 @@ class PhotoUploadSerializer(serializers.ModelSerializer):
 
 class AlbumListSerializer(serializers.ModelSerializer):
     cover_url = serializers.SerializerMethodField()
+    cover_renditions = serializers.SerializerMethodField()
     photo_count = serializers.IntegerField(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
 
@@ -32,8 +55,8 @@ class AlbumListSerializer(serializers.ModelSerializer):
         model = Album
         fields = [
             'id', 'name', 'slug', 'category', 'category_name',
-            'date', 'description', 'cover_url', 'photo_count',
-            'is_published', 'order', 'created_at'
+            'date', 'description', 'cover_url', 'cover_renditions', 'cover_blurhash',
+            'cover_color', 'photo_count', 'is_published', 'order', 'created_at'
         ]
 
     def get_cover_url(self, obj):
@@ -42,9 +65,36 @@ class AlbumListSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.cover.url)
         return None
 
+    def get_cover_renditions(self, obj):
+        return rendition_urls(self.context.get('request'), obj.cover_renditions)
+
+
+class HomeAlbumSerializer(serializers.ModelSerializer):
+    """Trimmed album card for the homepage / navbar"""
+    cover_url = serializers.SerializerMethodField()
+    cover_renditions = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Album
+        fields = [
+            'id', 'name', 'slug', 'date', 'cover_url', 'cover_renditions',
+            'cover_blurhash', 'cover_color', 'created_at'
+        ]
+
+    def get_cover_url(self, obj):
+        request = self.context.get('request')
+        if obj.cover and request:
+            return request.build_absolute_uri(obj.cover.url)
+        return None
+
+    def get_cover_renditions(self, obj):
+        return rendition_urls(self.context.get('request'), obj.cover_renditions)
+
 
 class AlbumDetailSerializer(serializers.ModelSerializer):
-    photos = PhotoSerializer(many=True, read_only=True)
+    # First window of photos, set by AlbumViewSet.retrieve; `photos_next` continues it
+    photos = PhotoSerializer(source='photo_window', many=True, read_only=True)
+    photos_next = serializers.CharField(read_only=True, allow_null=True)
     cover_url = serializers.SerializerMethodField()
     category_name = serializers.CharField(source='category.name', read_only=True)
     photo_count = serializers.IntegerField(read_only=True)
@@ -53,7 +103,8 @@ class AlbumDetailSerializer(serializers.ModelSerializer):
         model = Album
         fields = [
             'id', 'name', 'slug', 'category', 'category_name',
-            'date', 'description', 'cover_url', 'photos',
+            'date', 'description', 'cover_url', 'cover_blurhash', 'cover_color',
+            'photos', 'photos_next',
             'photo_count', 'is_published', 'order',
             'created_at', 'updated_at'
         ]
@@ -70,7 +121,7 @@ class CategoryCoverSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CategoryCover
-        fields = ['id', 'image_url', 'title', 'order', 'is_active']
+        fields = ['id', 'image_url', 'blurhash', 'color', 'title', 'order', 'is_active']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -80,9 +131,17 @@ class CategoryCoverSerializer(serializers.ModelSerializer):
     
 
 class CategorySerializer(serializers.ModelSerializer):
+    cover_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'cover_url']
+        fields = [
+            'id', 'name', 'slug', 'cover_url', 'cover_renditions',
+            'cover_blurhash', 'cover_color', 'published_album_count'
+        ]
+
+    def get_cover_renditions(self, obj):
+        return rendition_urls(self.context.get('request'), obj.cover_renditions)
 
 class PhotoReorderSerializer(serializers.Serializer):
     """Used for reordering photos via drag & drop"""
@@ -91,3 +150,8 @@ class PhotoReorderSerializer(serializers.Serializer):
             child=serializers.IntegerField()
         )
     )
+
+
+class PhotoMoveSerializer(serializers.Serializer):
+    """Moves one photo before another (or to the end when `before` is null)"""
+    before = serializers.IntegerField(allow_null=True, required=False)
@@ -0,0 +1,71 @@
+"""
+Adding photos to an album, shared by the API (PhotoViewSet.perform_create and
+bulk_upload), the admin upload view and finished resumable uploads.
+
+Every file is checked against Photo.image's validators (extension, size)
+before anything is stored, then written to storage, outside any lock. Then, in one
+transaction, the album row is locked, the orders after the album's current
+last photo are read with a single MAX() and the photos and their image jobs
+are inserted with one bulk_create each. Concurrent uploads into the same
+album queue on the lock instead of reading the same MAX().
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .caching import invalidate_albums
+from .jobs import KIND_FOR_MODEL
+from .models import ImageJob, Photo
+from .ordering import lock_album, next_order
+
+
+def validate_upload(file):
+    """
+    Run Photo.image's validators on ``file`` (anything with a name and a
+    size). Raises ValidationError.
+    """
+    Photo._meta.get_field("image").run_validators(file)
+
+
+def upload_photos(album, files, **fields):
+    """
+    Create a photo for each of ``files`` at the end of ``album``, in the
+    given sequence, and queue their processing. ``fields`` (caption,
+    is_featured, ...) are set on every photo. Returns the saved photos.
+    Raises ValidationError, storing nothing, if any file is rejected.
+
+    bulk_create skips the Photo signals; what they would do (flag the image
+    for processing, queue the job, invalidate cached responses) is done here.
+    """
+    errors = []
+    for file in files:
+        try:
+            validate_upload(file)
+        except ValidationError as e:
+            errors += [f"{file.name}: {message}" for message in e.messages]
+    if errors:
+        raise ValidationError(errors)
+
+    photos = []
+    for file in files:
+        photo = Photo(album=album, processing_status=Photo.ProcessingStatus.PENDING, **fields)
+        photo.image.save(file.name, file, save=False)
+        photos.append(photo)
+
+    if not photos:
+        return photos
+
+    with transaction.atomic():
+        lock_album(album.pk)
+        for photo, order in zip(photos, next_order(album.pk, len(photos))):
+            photo.order = order
+            if not photo.alt_text:
+                photo.alt_text = photo.default_alt_text()
+        Photo.objects.bulk_create(photos)
+
+        ImageJob.objects.bulk_create([
+            ImageJob(kind=KIND_FOR_MODEL[Photo], object_id=photo.pk, source_name=photo.image.name)
+            for photo in photos
+        ])
+        invalidate_albums([album.pk])
+
+    return photos
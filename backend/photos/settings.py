@@ -240,10 +240,88 @@ STATIC_ROOT = "/staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/app/media"
 
-
-# Upload limits (30MB)
-FILE_UPLOAD_MAX_MEMORY_SIZE = 30 * 1024 * 1024  # 30MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 30 * 1024 * 1024  # 30MB
+# Uploads are stored under the hash of their content (photos.storage): identical
+# files are kept once and media/blobs/ URLs are served as immutable
+STORAGES = {
+    "default": {"BACKEND": "photos.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+# How long browsers / CDNs may keep a blob without revalidating. In production the
+# front server serves media/ and must send this itself for media/blobs/, e.g.
+#   location /media/blobs/ { add_header Cache-Control "public, max-age=31536000, immutable"; }
+MEDIA_BLOB_MAX_AGE = 365 * 24 * 60 * 60
+# Unreferenced blobs saved more recently than this are kept for `manage.py sweep_media`:
+# the row that is about to use them may not be committed yet
+MEDIA_RELEASE_GRACE = int(os.getenv("MEDIA_RELEASE_GRACE", 60 * 60))
+
+# On-demand resized copies (/img/<w>x<h>/<name>, photos.resizing). Only these
+# bounding boxes are served, so the endpoint can't be used to fill the disk
+RESIZE_SIZES = [
+    (112, 112),    # admin list thumbnails (56px at 2x)
+    (480, 480),    # admin previews, category cards
+    (800, 800),
+    (1200, 630),   # Open Graph images
+    (1920, 1080),  # hero carousel
+]
+RESIZE_CACHE_DIR = os.getenv("RESIZE_CACHE_DIR", os.path.join(BASE_DIR, "runtime", "resized"))
+# Least recently used variants are evicted above this many bytes
+RESIZE_CACHE_MAX_BYTES = int(os.getenv("RESIZE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Variants of files outside blobs/ can change, so they're cached for less
+RESIZE_MAX_AGE = 24 * 60 * 60
+# A request waits at most this long for image memory before getting a 503
+RESIZE_ADMISSION_TIMEOUT = float(os.getenv("RESIZE_ADMISSION_TIMEOUT", 10))
+# When set, variants already on disk are handed to the front server with
+# X-Accel-Redirect instead of being streamed by a worker. It must map this
+# internal location onto RESIZE_CACHE_DIR, e.g.
+#   location /_resized/ { internal; alias /app/runtime/resized/; }
+RESIZE_ACCEL_REDIRECT_PREFIX = os.getenv("RESIZE_ACCEL_REDIRECT_PREFIX", "")
+
+
+# Uploads are always streamed to a temp file on disk (64KB chunks), never
+# held in memory; validate_image_size still caps each image at 20MB
+FILE_UPLOAD_HANDLERS = ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+# Non-file form fields only (file data is not counted)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+
+# Resumable uploads (photos.resumable): bytes received so far are staged here,
+# one file per upload, and sent to the Photo ingest once complete
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(BASE_DIR, "runtime", "uploads"))
+# Largest body accepted by one PATCH; keeps each request well inside the gunicorn timeout
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024))
+# Unfinished uploads are resumable for this long, then purged (manage.py purge_uploads)
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 60 * 60))
+
+# Background image worker (manage.py process_image_jobs): child processes used
+# to decode/resize/encode uploads in parallel
+IMAGE_WORKER_PROCESSES = int(os.getenv("IMAGE_WORKER_PROCESSES", os.cpu_count() or 1))
+# Address-space ceiling per image process (0 = unlimited). A 24MP decode
+# needs ~70MB of bitmap plus Python/Pillow overhead.
+IMAGE_WORKER_MEMORY_LIMIT = int(os.getenv("IMAGE_WORKER_MEMORY_LIMIT", 768 * 1024 * 1024))
+# Pillow refuses to decode anything above 2x this many pixels
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 60_000_000))
+# Encoded output is spooled here before being streamed into storage
+IMAGE_SPOOL_DIR = os.getenv("IMAGE_SPOOL_DIR") or FILE_UPLOAD_TEMP_DIR
+# Cross-process admission control for Pillow decodes (photos.admission):
+# total estimated bitmap memory allowed at once across every process that
+# shares IMAGE_ADMISSION_DIR, and how long work may queue for it
+IMAGE_MEMORY_BUDGET = int(os.getenv("IMAGE_MEMORY_BUDGET", 1024 * 1024 * 1024))
+IMAGE_ADMISSION_TIMEOUT = float(os.getenv("IMAGE_ADMISSION_TIMEOUT", 60))
+IMAGE_ADMISSION_DIR = os.getenv("IMAGE_ADMISSION_DIR", os.path.join(BASE_DIR, "runtime"))
+
+# File-based so every gunicorn worker and the image worker share one cache
+# without needing Redis; holds the API response cache (photos.caching)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "runtime", "cache")),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+# Lock files that let only one process render a cold response (photos.caching)
+API_CACHE_LOCK_DIR = os.path.join(CACHES["default"]["LOCATION"], "locks")
+# Cached API responses are invalidated by version bumps, this only bounds disk use
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 24 * 60 * 60))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
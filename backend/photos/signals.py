@@ -1,88 +1,98 @@
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
-from .models import Album, Photo, CategoryCover
-from .utils import compress_image
+from django.db.models.signals import pre_save, post_save, post_delete
+from .models import Category, Album, Photo, CategoryCover
+from .caching import bump, invalidate_albums, invalidate_all
+from .jobs import enqueue
 
 
 @receiver(pre_save, sender=Album)
-def compress_album_cover(sender, instance, **kwargs):
-    """Compress album cover image before saving"""
-    if instance.pk:
-        try:
-            old_instance = Album.objects.get(pk=instance.pk)
-            # Only compress if cover changed
-            if old_instance.cover != instance.cover and instance.cover:
-                if not isinstance(instance.cover, str):
-                    instance.cover = compress_image(
-                        instance.cover,
-                        quality=85,
-                        max_width=1920,
-                        max_height=1920
-                    )
-        except Album.DoesNotExist:
-            pass
-    else:
-        # New instance - compress cover
-        if instance.cover and not isinstance(instance.cover, str):
-            instance.cover = compress_image(
-                instance.cover,
-                quality=85,
-                max_width=1920,
-                max_height=1920
-            )
+def flag_album_cover(sender, instance, **kwargs):
+    """Mark a new/changed cover for background processing"""
+    # Values as loaded (ChangeTrackingMixin): no query for the old row
+    previous = instance.previous_values()
+    if previous is not None:
+        instance._previous_category_id = previous["category"]
+        instance._previous_slug = previous["slug"]
+    # Only process if cover changed
+    if instance.cover and instance.has_changed("cover"):
+        instance._image_changed = True
 
 
 @receiver(pre_save, sender=Photo)
-def compress_photo_image(sender, instance, **kwargs):
-    """Compress photo image before saving"""
-    if instance.pk:
-        try:
-            old_instance = Photo.objects.get(pk=instance.pk)
-            # Only compress if image changed
-            if old_instance.image != instance.image and instance.image:
-                if not isinstance(instance.image, str):
-                    instance.image = compress_image(
-                        instance.image,
-                        quality=88,  # Higher quality for portfolio photos
-                        max_width=2400,
-                        max_height=2400
-                    )
-        except Photo.DoesNotExist:
-            pass
-    else:
-        # New instance - compress image
-        if instance.image and not isinstance(instance.image, str):
-            instance.image = compress_image(
-                instance.image,
-                quality=88,
-                max_width=2400,
-                max_height=2400
-            )
+def flag_photo_image(sender, instance, **kwargs):
+    """Mark a new/changed photo for background processing"""
+    # Only process if image changed
+    if instance.image and instance.has_changed("image"):
+        instance._image_changed = True
+        instance.processing_status = Photo.ProcessingStatus.PENDING
 
 
 @receiver(pre_save, sender=CategoryCover)
-def compress_category_cover(sender, instance, **kwargs):
-    """Compress category cover image before saving"""
-    if instance.pk:
-        try:
-            old_instance = CategoryCover.objects.get(pk=instance.pk)
-            # Only compress if image changed
-            if old_instance.image != instance.image and instance.image:
-                if not isinstance(instance.image, str):
-                    instance.image = compress_image(
-                        instance.image,
-                        quality=85,
-                        max_width=1920,
-                        max_height=1920
-                    )
-        except CategoryCover.DoesNotExist:
-            pass
-    else:
-        # New instance - compress image
-        if instance.image and not isinstance(instance.image, str):
-            instance.image = compress_image(
-                instance.image,
-                quality=85,
-                max_width=1920,
-                max_height=1920
-            )
\ No newline at end of file
+def flag_category_cover(sender, instance, **kwargs):
+    """Mark a new/changed category cover for background processing"""
+    previous = instance.previous_values()
+    if previous is not None:
+        instance._previous_category_id = previous["category"]
+    # Only process if image changed
+    if instance.image and instance.has_changed("image"):
+        instance._image_changed = True
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Photo)
+@receiver(post_save, sender=CategoryCover)
+def enqueue_image_job(sender, instance, **kwargs):
+    """
+    The raw upload is already on disk at this point; compression, metadata
+    and renditions are done by `manage.py process_image_jobs`.
+    """
+    if getattr(instance, "_image_changed", False):
+        instance._image_changed = False
+        enqueue(instance)
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=CategoryCover)
+@receiver(post_delete, sender=CategoryCover)
+def refresh_category_summary(sender, instance, **kwargs):
+    """
+    Keep Category.cover_path / published_album_count in step with albums
+    and covers, including the category an album or cover was moved out of.
+    Runs inside the caller's transaction.
+    """
+    pks = {instance.category_id, getattr(instance, "_previous_category_id", None)}
+    Category.refresh_summaries(pks)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    # Category names/slugs appear in every list and album; they rarely change
+    invalidate_all()
+
+
+@receiver(post_save, sender=CategoryCover)
+@receiver(post_delete, sender=CategoryCover)
+def invalidate_cover_responses(sender, instance, **kwargs):
+    bump("catalogue")
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+def invalidate_album_responses(sender, instance, **kwargs):
+    category_slugs = Category.objects.filter(
+        pk__in=[instance.category_id, getattr(instance, "_previous_category_id", None)]
+    ).values_list("slug", flat=True)
+    bump(
+        "catalogue",
+        f"album:{instance.slug}",
+        f"album:{getattr(instance, '_previous_slug', instance.slug)}",
+        *(f"category:{slug}" for slug in category_slugs),
+    )
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def invalidate_photo_responses(sender, instance, **kwargs):
+    invalidate_albums([instance.album_id])
@@ -0,0 +1,177 @@
+"""
+Content-addressed media storage.
+
+Every file saved through ContentAddressedStorage is named after the SHA-256
+of its bytes (blobs/ab/cd/<digest>.<ext>); the name ``upload_to`` produced
+only contributes the extension. Saving bytes that are already stored
+returns the existing name without writing, so rows uploaded from the same
+file share one blob, and a blob name never points at different bytes:
+its URL can be cached forever (settings.MEDIA_BLOB_MAX_AGE).
+
+Renditions are named after their blob (rendition_name) and are written
+once as well. Because files are shared, deleting one goes through
+release_files(), which leaves alone anything a row still points at.
+
+A row is inserted some time after its file was saved, so a release can't
+see a reference that is about to exist. Saves and releases of a blob
+therefore take the same lock (keyed on its hash): a save of bytes already
+stored refreshes the blob's mtime, and release_files leaves blobs saved
+within MEDIA_RELEASE_GRACE alone; `manage.py sweep_media` collects them later.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+BLOB_PREFIX = "blobs"
+
+# Lock files for blob saves / releases, one per leading hash byte
+LOCK_DIR = ".locks"
+
+# albums/x/photos/0007_320w.jpg -> albums/x/photos/0007
+_RENDITION_SUFFIX = re.compile(r"_\d+w$")
+
+
+def content_hash(content):
+    """SHA-256 hex digest of a Django File, read in chunks; leaves it rewound"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if content.seekable():
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest, ext):
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + "/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content once, under its hash"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        if not is_blob(name):
+            name = blob_name(content_hash(content), os.path.splitext(name)[1])
+        with self.lock(name):
+            # Same hash (or a rendition of the same blob): the bytes are already here.
+            # The fresh mtime keeps a concurrent release_files from deleting them
+            # before the row that is about to use them is committed
+            if self.exists(name):
+                os.utime(self.path(name))
+                return name
+            return super().save(name, content, max_length)
+
+    def _save(self, name, content):
+        if not is_blob(name):
+            return super()._save(name, content)
+
+        # Written aside, then linked into place: readers never see a partial
+        # blob, and a blob that appeared meanwhile holds the same bytes
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+            for chunk in content.chunks():
+                f.write(chunk)
+        try:
+            if self.file_permissions_mode is not None:
+                os.chmod(f.name, self.file_permissions_mode)
+            os.link(f.name, full_path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(f.name)
+        return name
+
+    @contextmanager
+    def lock(self, name):
+        """Exclusive, cross-process lock on the blob ``name`` (and its renditions) belongs to"""
+        key = os.path.basename(_owner_root(name))[:2]
+        directory = os.path.join(self.location, BLOB_PREFIX, LOCK_DIR)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{key}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _owner_root(name):
+    """Name (without extension) of the stored image a file belongs to"""
+    return _RENDITION_SUFFIX.sub("", os.path.splitext(name)[0])
+
+
+def referenced_files(names):
+    """
+    Those of ``names`` that some Photo / Album / CategoryCover row still
+    uses, as its image or as one of that image's renditions.
+    """
+    from django.db.models import Q
+    from .models import Album, CategoryCover, Photo
+
+    roots = {_owner_root(name) for name in names if name}
+    if not roots:
+        return set()
+
+    used = set()
+    for model, field_name in ((Photo, "image"), (Album, "cover"), (CategoryCover, "image")):
+        condition = Q()
+        for root in roots:
+            condition |= Q(**{f"{field_name}__startswith": root + "."})
+        used.update(
+            _owner_root(name)
+            for name in model.objects.filter(condition).values_list(field_name, flat=True)
+        )
+    return {name for name in names if name and _owner_root(name) in used}
+
+
+def release_files(storage, names, grace=None):
+    """
+    Delete the files in ``names`` that no row references any more. Blobs
+    saved less than ``grace`` seconds ago (MEDIA_RELEASE_GRACE) are kept:
+    a row may be about to point at them.
+    """
+    if grace is None:
+        grace = settings.MEDIA_RELEASE_GRACE
+    names = {name for name in names if name}
+    cutoff = time.time() - grace
+    for name in names - referenced_files(names):
+        if not is_blob(name) or not hasattr(storage, "lock"):
+            if storage.exists(name):
+                storage.delete(name)
+            continue
+        with storage.lock(name):
+            try:
+                if os.stat(storage.path(name)).st_mtime < cutoff:
+                    storage.delete(name)
+            except FileNotFoundError:
+                pass
+
+
+def release_files_on_commit(storage, names):
+    """release_files once the current transaction commits (at once outside one)"""
+    from django.db import transaction
+
+    names = [name for name in names if name]
+    transaction.on_commit(lambda: release_files(storage, names))
+
+
+def rendition_files(renditions):
+    return [r.get("name") for r in (renditions or {}).values()]
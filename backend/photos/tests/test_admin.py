@@ -0,0 +1,74 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from photos.models import Album, Category, Photo
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class PhotoBulkEditQueryTests(TransactionTestCase):
+    """
+    Saving N photos from the changelist's list_editable invalidates the
+    cached responses of their albums once, on commit, not once per photo.
+    (TransactionTestCase: each request commits, as it would in production.)
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Nunta")
+        albums = [
+            Album.objects.create(name=f"Album {a}", category=category, date=datetime.date(2024, 1, 1))
+            for a in range(2)
+        ]
+        Photo.objects.bulk_create([
+            Photo(
+                album=albums[p % 2],
+                image=f"albums/x/photos/{p:04d}.jpg",
+                order=(p + 1) * 1000,
+                processing_status=Photo.ProcessingStatus.READY,
+            )
+            for p in range(8)
+        ])
+
+    # The changelist's id lookup, the album for the admin log's repr, the UPDATE
+    # and the log entry: nothing for cache invalidation
+    QUERIES_PER_PHOTO = 4
+
+    def edit_captions(self, photos, label="Edited"):
+        data = {
+            "form-TOTAL_FORMS": len(photos),
+            "form-INITIAL_FORMS": len(photos),
+            "_save": "Save",
+        }
+        for i, photo in enumerate(photos):
+            data.update({
+                f"form-{i}-id": photo.pk,
+                f"form-{i}-order": photo.order,
+                f"form-{i}-caption": f"{label} {photo.pk}",
+            })
+        ids = ",".join(str(photo.pk) for photo in photos)
+        # Every measurement pays for the admin log's content type lookup
+        ContentType.objects.clear_cache()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/admin/photos/photo/?id__in={ids}", data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Photo.objects.filter(caption__startswith=label).count(), len(photos))
+        return queries
+
+    def test_album_slugs_read_once_per_edit(self):
+        queries = self.edit_captions(list(Photo.objects.order_by("pk")))
+        slug_reads = [q["sql"] for q in queries.captured_queries if 'SELECT "album"."slug"' in q["sql"]]
+        self.assertEqual(len(slug_reads), 1)
+
+    def test_cost_per_photo_is_constant(self):
+        photos = list(Photo.objects.order_by("pk"))
+        few = len(self.edit_captions(photos[:2], "First"))
+        many = len(self.edit_captions(photos, "Second"))
+        self.assertEqual(many - few, (len(photos) - 2) * self.QUERIES_PER_PHOTO)
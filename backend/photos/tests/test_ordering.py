@@ -0,0 +1,77 @@
+import datetime
+
+from django.test import TestCase
+
+from photos.models import Album, Category, Photo
+from photos.ordering import ORDER_GAP, move_photo, reorder_photos
+
+
+class PhotoOrderingTests(TestCase):
+    """Gapped photo ordering (photos.ordering)"""
+
+    def setUp(self):
+        category = Category.objects.create(name="Nunta")
+        self.album = Album.objects.create(name="Album", category=category, date=datetime.date(2024, 1, 1))
+        self.photos = Photo.objects.bulk_create([
+            Photo(album=self.album, image=f"albums/x/photos/{i:04d}.jpg", order=(i + 1) * ORDER_GAP)
+            for i in range(4)
+        ])
+
+    def sequence(self):
+        return list(Photo.objects.filter(album=self.album).order_by("order", "id").values_list("pk", flat=True))
+
+    def orders(self):
+        return dict(Photo.objects.filter(album=self.album).values_list("pk", "order"))
+
+    def test_move_takes_midpoint_and_touches_one_row(self):
+        p1, p2, p3, p4 = self.photos
+        before = self.orders()
+        move_photo(p4, before=p2)
+
+        after = self.orders()
+        self.assertEqual(after[p4.pk], (ORDER_GAP + 2 * ORDER_GAP) // 2)
+        self.assertEqual({pk: order for pk, order in after.items() if pk != p4.pk},
+                         {pk: order for pk, order in before.items() if pk != p4.pk})
+        self.assertEqual(self.sequence(), [p1.pk, p4.pk, p2.pk, p3.pk])
+
+    def test_exhausted_gap_rebalances_album(self):
+        p1, p2, p3, p4 = self.photos
+        for i, photo in enumerate(self.photos):
+            Photo.objects.filter(pk=photo.pk).update(order=i + 1)
+
+        move_photo(p4, before=p2)
+
+        self.assertEqual(self.sequence(), [p1.pk, p4.pk, p2.pk, p3.pk])
+        orders = sorted(self.orders().values())
+        # Renumbered with the full gap, the moved photo at the new midpoint
+        self.assertEqual(orders, [ORDER_GAP, ORDER_GAP + ORDER_GAP // 2, 2 * ORDER_GAP, 3 * ORDER_GAP])
+
+    def test_move_to_first(self):
+        p1, p2, p3, p4 = self.photos
+        move_photo(p3, before=p1)
+        self.assertEqual(self.sequence(), [p3.pk, p1.pk, p2.pk, p4.pk])
+        self.assertEqual(self.orders()[p3.pk], ORDER_GAP // 2)
+
+    def test_move_to_first_with_no_room_left(self):
+        p1, p2, p3, p4 = self.photos
+        Photo.objects.filter(pk=p1.pk).update(order=1)
+        move_photo(p3, before=p1)
+        self.assertEqual(self.sequence(), [p3.pk, p1.pk, p2.pk, p4.pk])
+
+    def test_move_to_last(self):
+        p1, p2, p3, p4 = self.photos
+        move_photo(p1, before=None)
+        self.assertEqual(self.sequence(), [p2.pk, p3.pk, p4.pk, p1.pk])
+        self.assertEqual(self.orders()[p1.pk], 5 * ORDER_GAP)
+
+    def test_move_before_photo_of_other_album(self):
+        other = Album.objects.create(name="Other", category=self.album.category, date=datetime.date(2024, 1, 1))
+        stranger = Photo.objects.create(album=other, image="albums/y/photos/0001.jpg", order=ORDER_GAP)
+        with self.assertRaises(ValueError):
+            move_photo(self.photos[0], before=stranger)
+
+    def test_reorder_lists_given_ids_first(self):
+        p1, p2, p3, p4 = self.photos
+        reorder_photos(self.album.pk, [p3.pk, p1.pk, 999999])
+        self.assertEqual(self.sequence(), [p3.pk, p1.pk, p2.pk, p4.pk])
+        self.assertEqual(sorted(self.orders().values()), [ORDER_GAP * (i + 1) for i in range(4)])
@@ -0,0 +1,91 @@
+import base64
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from photos.models import Album, Category, Photo
+
+
+def page_ids(client, url):
+    """Ids of every row the cursor pages starting at ``url`` return, in order"""
+    ids, pages = [], 0
+    while url:
+        data = client.get(url).json()
+        ids += [row["id"] for row in data["results"]]
+        url = data["next"]
+        pages += 1
+    return ids, pages
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class KeysetPaginationTests(TestCase):
+    """Cursor pages (photos.pagination.KeysetPagination) over tied sort keys"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Nunta")
+        # Only two distinct (order, date) keys: the id has to break the ties
+        dates = [datetime.date(2024, 1, 1), datetime.date(2023, 6, 1)]
+        cls.albums = Album.objects.bulk_create([
+            Album(
+                name=f"Album {i}", slug=f"album-{i}", category=category,
+                order=i % 2, date=dates[i % 3 == 0], is_published=True,
+            )
+            for i in range(11)
+        ])
+        cls.album = cls.albums[0]
+        cls.photos = Photo.objects.bulk_create([
+            Photo(
+                album=cls.album, image=f"albums/x/photos/{i:04d}.jpg",
+                order=1000 * (i // 4), processing_status=Photo.ProcessingStatus.READY,
+            )
+            for i in range(10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_albums_through_ties(self):
+        ids, pages = page_ids(self.client, "/api/albums/?page_size=3")
+        expected = [album.pk for album in sorted(self.albums, key=lambda a: (a.order, -a.date.toordinal(), a.pk))]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_photos_through_ties(self):
+        ids, _ = page_ids(self.client, f"/api/albums/{self.album.slug}/photos/?page_size=3")
+        self.assertEqual(ids, [photo.pk for photo in self.photos])
+
+    def test_invalid_cursor(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+        url = self.client.get("/api/albums/?page_size=3").json()["next"]
+        cursor = url.split("cursor=")[1].split("&")[0]
+        tampered = ("A" if cursor[0] != "A" else "B") + cursor[1:]
+
+        for bad in (
+            "not-base64!",
+            tampered,
+            encode(b"{}"),                      # not a list
+            encode(b"[0, 1]"),                  # wrong length
+            encode(b'[0, "yesterday", 1]'),     # not a date
+        ):
+            with self.subTest(cursor=bad):
+                response = self.client.get("/api/albums/", {"cursor": bad})
+                self.assertEqual(response.status_code, 404)
+
+    def test_album_detail_window_continues_on_photos(self):
+        data = self.client.get(f"/api/albums/{self.album.slug}/?page_size=4").json()
+        window = [photo["id"] for photo in data["photos"]]
+        self.assertEqual(len(window), 4)
+        self.assertIn(f"/api/albums/{self.album.slug}/photos/", data["photos_next"])
+
+        rest, _ = page_ids(self.client, data["photos_next"])
+        self.assertFalse(set(window) & set(rest))
+        self.assertEqual(window + rest, [photo.pk for photo in self.photos])
+
+    def test_album_detail_without_more_photos(self):
+        data = self.client.get(f"/api/albums/{self.album.slug}/?page_size=100").json()
+        self.assertEqual(len(data["photos"]), len(self.photos))
+        self.assertIsNone(data["photos_next"])
@@ -0,0 +1,72 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from photos.management.commands.check_query_budget import BUDGETS
+from photos.models import Album, Category, Photo
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class PublicEndpointQueryBudgetTests(TestCase):
+    """
+    Every public API endpoint runs a fixed number of SQL queries, however
+    many categories, albums and photos there are (the budgets are shared
+    with `manage.py check_query_budget`).
+    """
+
+    CATEGORIES = 3
+    ALBUMS_PER_CATEGORY = 4
+    PHOTOS_PER_ALBUM = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        for c in range(cls.CATEGORIES):
+            category = Category.objects.create(name=f"Categoria {c}")
+            for a in range(cls.ALBUMS_PER_CATEGORY):
+                album = Album.objects.create(
+                    name=f"Album {c}-{a}",
+                    category=category,
+                    date=datetime.date(2024, 1, a + 1),
+                    is_published=True,
+                )
+                # bulk_create: no image jobs are queued for files that don't exist
+                Photo.objects.bulk_create([
+                    Photo(
+                        album=album,
+                        image=f"albums/{album.slug}/photos/{p:04d}.jpg",
+                        order=(p + 1) * 1000,
+                        is_featured=p == 0,
+                        processing_status=Photo.ProcessingStatus.READY,
+                    )
+                    for p in range(cls.PHOTOS_PER_ALBUM)
+                ])
+        Category.refresh_summaries()
+        cls.album = Album.objects.select_related("category").first()
+
+    def setUp(self):
+        # Measure the rendering path, not the response cache
+        cache.clear()
+
+    def assertWithinBudget(self, name, url):
+        with self.assertNumQueries(BUDGETS[name]):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_list(self):
+        self.assertWithinBudget("category-list", "/api/categories/")
+
+    def test_home(self):
+        self.assertWithinBudget("home", "/api/home/")
+
+    def test_album_list(self):
+        self.assertWithinBudget("album-list", "/api/albums/")
+
+    def test_album_list_by_category(self):
+        self.assertWithinBudget("album-list-by-category", f"/api/albums/?category={self.album.category.slug}")
+
+    def test_album_detail(self):
+        self.assertWithinBudget("album-detail", f"/api/albums/{self.album.slug}/")
+
+    def test_album_photos(self):
+        self.assertWithinBudget("album-photos", f"/api/albums/{self.album.slug}/photos/")
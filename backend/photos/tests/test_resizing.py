@@ -0,0 +1,50 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from photos.resizing import resized_url
+
+
+def jpeg_bytes(size=(640, 480)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (120, 60, 30)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class ResizedMediaTests(TestCase):
+    """/img/<w>x<h>/<name> (photos.resizing)"""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=f"{media}/media", RESIZE_CACHE_DIR=f"{media}/resized")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_resized_copy(self):
+        name = default_storage.save("albums/a/photos/ok.jpg", ContentFile(jpeg_bytes()))
+        url = resized_url(name, (480, 480))
+        self.assertTrue(url.startswith("/img/480x480/"))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (480, 360))
+
+    def test_size_not_whitelisted(self):
+        name = default_storage.save("albums/a/photos/ok.jpg", ContentFile(jpeg_bytes()))
+        self.assertEqual(self.client.get(f"/img/333x333/{name}").status_code, 404)
+
+    def test_truncated_source_is_not_found(self):
+        # A valid header, so the size estimate passes and decoding fails midway
+        name = default_storage.save("albums/a/photos/cut.jpg", ContentFile(jpeg_bytes()[:600]))
+        self.assertEqual(self.client.get(resized_url(name, (480, 480))).status_code, 404)
+
+    def test_not_an_image(self):
+        name = default_storage.save("albums/a/photos/text.jpg", ContentFile(b"not a jpeg"))
+        self.assertEqual(self.client.get(resized_url(name, (480, 480))).status_code, 404)
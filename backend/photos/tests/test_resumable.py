@@ -0,0 +1,115 @@
+import base64
+import datetime
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from photos.models import Album, Category, Photo, UploadSession
+
+
+def jpeg_bytes(size=(64, 48)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (120, 60, 30)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class ResumableUploadTests(TestCase):
+    """The tus endpoints (photos.resumable): resuming, checksums and a failed ingest"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("uploader", password="pw")
+        category = Category.objects.create(name="Nunta")
+        cls.album = Album.objects.create(name="Album", category=category, date=datetime.date(2024, 1, 1))
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=f"{media}/media",
+            UPLOAD_STAGING_DIR=f"{media}/uploads",
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = jpeg_bytes()
+
+    def tus(self, method, url, body=b"", **headers):
+        headers = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+        return getattr(self.client, method)(
+            url, body, content_type="application/offset+octet-stream", HTTP_TUS_RESUMABLE="1.0.0", **headers
+        )
+
+    def create(self):
+        filename = base64.b64encode(b"nunta.jpg").decode()
+        response = self.tus(
+            "post", f"/api/albums/{self.album.slug}/uploads/",
+            upload_length=str(len(self.data)), upload_metadata=f"filename {filename}",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response["Location"]
+
+    def patch(self, url, offset, end=None, **headers):
+        return self.tus("patch", url, self.data[offset:end], upload_offset=str(offset), **headers)
+
+    def offset(self, url):
+        return int(self.tus("head", url)["Upload-Offset"])
+
+    def test_resume_after_offset_mismatch(self):
+        url = self.create()
+        self.assertEqual(self.patch(url, 0, 100).status_code, 204)
+
+        # A client that lost track of what arrived (e.g. resent from 0) is told the offset
+        response = self.patch(url, 0, 100)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.offset(url), 100)
+
+        response = self.patch(url, self.offset(url))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(int(response["Upload-Offset"]), len(self.data))
+
+        session = UploadSession.objects.get()
+        self.assertEqual(session.photo.processing_status, Photo.ProcessingStatus.PENDING)
+        with session.photo.image.open("rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_checksum_mismatch_keeps_offset(self):
+        url = self.create()
+        wrong = base64.b64encode(hashlib.sha256(b"something else").digest()).decode()
+        response = self.patch(url, 0, 100, upload_checksum=f"sha256 {wrong}")
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(self.offset(url), 0)
+
+        right = base64.b64encode(hashlib.sha256(self.data[:100]).digest()).decode()
+        self.assertEqual(self.patch(url, 0, 100, upload_checksum=f"sha256 {right}").status_code, 204)
+        self.assertEqual(self.offset(url), 100)
+
+    def test_failed_ingest_can_be_retried(self):
+        url = self.create()
+        self.assertEqual(self.patch(url, 0, 100).status_code, 204)
+
+        with mock.patch("photos.resumable.upload_photos", side_effect=ValidationError("Storage unavailable")):
+            response = self.patch(url, 100)
+        self.assertEqual(response.status_code, 400)
+
+        # Neither completed nor lost: the last chunk can be sent again
+        session = UploadSession.objects.get()
+        self.assertEqual(session.offset, 100)
+        self.assertIsNone(session.photo)
+        self.assertEqual(self.offset(url), 100)
+
+        self.assertEqual(self.patch(url, 100).status_code, 204)
+        session.refresh_from_db()
+        self.assertEqual(session.offset, len(self.data))
+        self.assertEqual(Photo.objects.filter(album=self.album).count(), 1)
@@ -0,0 +1,137 @@
+import datetime
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from photos.models import Album, Category, CategoryCover, Photo
+from photos.storage import is_blob, release_files
+from photos.utils import rendition_name
+
+GRACE = 60 * 60
+
+
+def make_old(name):
+    """Backdate a stored file past the release grace period"""
+    old = time.time() - 2 * GRACE
+    os.utime(default_storage.path(name), (old, old))
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Shared blobs (photos.storage): dedupe on save, reference-checked deletes, the grace period"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Nunta")
+        cls.album = Album.objects.create(name="Album", category=cls.category, date=datetime.date(2024, 1, 1))
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=f"{media}/media",
+            MEDIA_RELEASE_GRACE=GRACE,
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def save(self, data=b"same bytes", name="albums/x/photos/0001.jpg"):
+        return default_storage.save(name, ContentFile(data))
+
+    def photo(self, image, renditions=None):
+        return Photo.objects.bulk_create([Photo(album=self.album, image=image, renditions=renditions or {})])[0]
+
+    def delete(self, row):
+        # Files are released once the delete commits
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+
+    def test_identical_content_is_stored_once(self):
+        first = self.save(name="albums/a/photos/0001.jpg")
+        second = self.save(name="categories/b/covers/cover.JPG")
+        self.assertTrue(is_blob(first))
+        self.assertEqual(first, second)
+        self.assertNotEqual(self.save(b"other bytes"), first)
+
+        files = [f for _, dirs, files in os.walk(default_storage.path("blobs")) for f in files if not f.endswith(".lock")]
+        self.assertEqual(len(files), 2)
+
+    def test_shared_blob_survives_deleting_one_photo(self):
+        name = self.save()
+        make_old(name)
+        first, second = self.photo(name), self.photo(name)
+
+        self.delete(first)
+        self.assertTrue(default_storage.exists(name))
+
+        self.delete(second)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_cover_keeps_a_blob_a_photo_released(self):
+        name = self.save()
+        make_old(name)
+        photo = self.photo(name)
+        cover = CategoryCover.objects.bulk_create([CategoryCover(category=self.category, image=name)])[0]
+
+        self.delete(photo)
+        self.assertTrue(default_storage.exists(name))
+
+        self.delete(cover)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_renditions_follow_their_blob(self):
+        name = self.save()
+        small = self.save(b"small", rendition_name(name, 320))
+        self.assertEqual(small, rendition_name(name, 320))
+        for stored in (name, small):
+            make_old(stored)
+        renditions = {"320": {"name": small, "width": 320}}
+        photo, other = self.photo(name, renditions), self.photo(name)
+
+        # The other row points at the same blob, so its renditions are still in use
+        self.delete(photo)
+        self.assertTrue(default_storage.exists(small))
+
+        self.delete(other)
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(small))
+        release_files(default_storage, [small])
+        self.assertFalse(default_storage.exists(small))
+
+    def test_unreferenced_blob_waits_for_the_grace_period(self):
+        name = self.save()
+        self.delete(self.photo(name))
+        self.assertTrue(default_storage.exists(name))
+
+        make_old(name)
+        release_files(default_storage, [name])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_saving_existing_bytes_restarts_the_grace_period(self):
+        # A row about to point at an old blob re-saves it first
+        name = self.save()
+        make_old(name)
+        self.assertEqual(self.save(), name)
+        release_files(default_storage, [name])
+        self.assertTrue(default_storage.exists(name))
+
+    def test_sweep_media(self):
+        recent = self.save(b"recent")
+        old = self.save(b"old")
+        used = self.save(b"used")
+        make_old(old)
+        make_old(used)
+        self.photo(used)
+
+        call_command("sweep_media", stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(recent))
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists(used))
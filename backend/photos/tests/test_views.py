@@ -0,0 +1,47 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from photos.models import Album, Category, Photo
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class UnprocessedPhotoTests(TestCase):
+    """Until the image worker is done a photo is the raw upload: the public API leaves it out"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Nunta")
+        cls.album = Album.objects.create(
+            name="Album", category=category, date=datetime.date(2024, 1, 1), is_published=True
+        )
+        statuses = [
+            Photo.ProcessingStatus.READY,
+            Photo.ProcessingStatus.PENDING,
+            Photo.ProcessingStatus.READY,
+            Photo.ProcessingStatus.FAILED,
+        ]
+        photos = Photo.objects.bulk_create([
+            Photo(album=cls.album, image=f"albums/x/photos/{i:04d}.jpg", order=(i + 1) * 1000, processing_status=status)
+            for i, status in enumerate(statuses)
+        ])
+        cls.ready_ids = [photo.pk for photo in photos if photo.processing_status == Photo.ProcessingStatus.READY]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_album_detail(self):
+        data = self.client.get(f"/api/albums/{self.album.slug}/").json()
+        self.assertEqual([photo["id"] for photo in data["photos"]], self.ready_ids)
+        self.assertEqual(data["photo_count"], 2)
+
+    def test_album_photos(self):
+        data = self.client.get(f"/api/albums/{self.album.slug}/photos/").json()
+        self.assertEqual([photo["id"] for photo in data["results"]], self.ready_ids)
+        data = self.client.get(f"/api/albums/{self.album.slug}/photos/?all=1").json()
+        self.assertEqual([photo["id"] for photo in data], self.ready_ids)
+
+    def test_album_list_count(self):
+        data = self.client.get("/api/albums/?all=1").json()
+        self.assertEqual(data[0]["photo_count"], 2)
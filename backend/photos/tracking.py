@@ -0,0 +1,67 @@
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+
+
+class ChangeTrackingMixin:
+    """
+    Remembers what ``tracked_fields`` held when the instance was loaded from
+    the database (or last saved), so save receivers can tell what changed
+    without selecting the old row again. Files are compared by name.
+
+    Fields deferred at load time are fetched with one query when asked for.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._take_snapshot()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._take_snapshot()
+
+    def _tracked_value(self, name):
+        value = getattr(self, self._meta.get_field(name).attname)
+        if isinstance(value, FieldFile):
+            return value.name or ""
+        return value
+
+    def _take_snapshot(self):
+        deferred = self.get_deferred_fields()
+        self._snapshot = {
+            name: self._tracked_value(name)
+            for name in self.tracked_fields
+            if self._meta.get_field(name).attname not in deferred
+        }
+
+    def previous_values(self):
+        """
+        {field name: value} of the stored row as last seen, or None when the
+        row doesn't exist yet.
+        """
+        if self.pk is None:
+            return None
+        snapshot = dict(getattr(self, "_snapshot", {}))
+        missing = [name for name in self.tracked_fields if name not in snapshot]
+        if missing:
+            attnames = {name: self._meta.get_field(name).attname for name in missing}
+            row = type(self)._base_manager.filter(pk=self.pk).values(*attnames.values()).first()
+            if row is None:
+                return None
+            for name, attname in attnames.items():
+                value = row[attname]
+                if isinstance(self._meta.get_field(name), FileField):
+                    value = value or ""
+                snapshot[name] = value
+        return snapshot
+
+    def has_changed(self, name):
+        """True if ``name`` differs from the stored row (always True for a new row)"""
+        previous = self.previous_values()
+        return previous is None or previous[name] != self._tracked_value(name)
@@ -4,10 +4,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from . import views
+from .storage import BLOB_PREFIX
 
 router = DefaultRouter()
 router.register('categories', views.CategoryViewSet, basename='category')
 router.register('albums', views.AlbumViewSet, basename='album')
+router.register('home', views.HomeViewSet, basename='home')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,14 +41,46 @@ urlpatterns = [
         views.PhotoViewSet.as_view({'post': 'reorder'}),
         name='album-photos-reorder'
     ),
+    path(
+        'api/albums/<slug:album_slug>/photos/<int:pk>/move/',
+        views.PhotoViewSet.as_view({'post': 'move'}),
+        name='album-photo-move'
+    ),
     path(
         'api/albums/<slug:album_slug>/photos/bulk-upload/',
         views.PhotoViewSet.as_view({'post': 'bulk_upload'}),
         name='album-photos-bulk-upload'
     ),
+
+    # Resumable (tus) uploads, photos.resumable
+    path(
+        'api/albums/<slug:album_slug>/uploads/',
+        views.AlbumUploadsView.as_view(),
+        name='album-uploads'
+    ),
+    path(
+        'api/uploads/<uuid:pk>/',
+        views.UploadView.as_view(),
+        name='upload-detail'
+    ),
+]
+
+# On-demand resized copies of any stored image. Kept outside MEDIA_URL, which
+# the front server answers itself in production
+urlpatterns += [
+    path(
+        'img/<int:width>x<int:height>/<path:path>',
+        views.resized_media,
+        name='media-resized'
+    ),
 ]
 
 if settings.DEBUG:
+    # Development only: in production the front server serves media/ itself,
+    # with the immutable Cache-Control for blobs/ set in its config
+    urlpatterns += [
+        path(f"{settings.MEDIA_URL.lstrip('/')}{BLOB_PREFIX}/<path:path>", views.serve_blob, name='media-blob'),
+    ]
     import debug_toolbar
     urlpatterns += [path("__debug__/", include(debug_toolbar.urls))]
     urlpatterns += [path("__reload__/", include("django_browser_reload.urls"))]
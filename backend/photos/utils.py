@@ -1,51 +1,242 @@
-from PIL import Image
-from io import BytesIO
-from django.core.files.uploadedfile import InMemoryUploadedFile
-import sys
+from PIL import Image, ImageOps, ExifTags
+from dataclasses import dataclass, field
+from django.core.files import File
+import os
+import resource
+import tempfile
 
-def compress_image(image, quality=50, max_width=2900, max_height=1500):
+from .placeholders import image_placeholders
+from .storage import is_blob
+
+# Widths (px) of the derivatives generated for every stored image
+RENDITION_WIDTHS = (320, 800, 1600, 2400)
+
+# JPEG DCT scaling picks the smallest 1/2, 1/4 or 1/8 scale that is still at
+# least DRAFT_GAP times the target; reduce() then box-averages down to
+# REDUCING_GAP times the target and LANCZOS does the final step. With these
+# values the output stays within SSIM 0.99 of a full-decode LANCZOS resize
+# (see `manage.py benchmark_resize`).
+DRAFT_GAP = 1.0
+REDUCING_GAP = 2.0
+
+
+def fit_size(size, max_width, max_height):
+    """Largest size that fits in max_width x max_height keeping aspect ratio"""
+    width, height = size
+    if width <= max_width and height <= max_height:
+        return size
+    ratio = min(max_width / width, max_height / height)
+    return int(width * ratio), int(height * ratio)
+
+
+def prepare_draft(img, target_size, draft_gap=DRAFT_GAP):
+    """
+    Ask the JPEG decoder to scale by 1/2, 1/4 or 1/8 while decoding, so a
+    6000x4000 upload is never fully materialised when a small output is
+    wanted. Must be called before the image is loaded; no-op for other formats.
+    """
+    if img.format != 'JPEG':
+        return
+    img.draft(
+        img.mode if img.mode in ('L', 'CMYK') else 'RGB',
+        (int(target_size[0] * draft_gap), int(target_size[1] * draft_gap)),
+    )
+
+
+def resize_image(img, target_size, reducing_gap=REDUCING_GAP):
+    """
+    Downscale with integer reduce() down to ``reducing_gap`` times the target,
+    then LANCZOS for the final step. Pair with prepare_draft() for JPEG input.
+    """
+    if img.size == tuple(target_size):
+        return img
+    return img.resize(target_size, Image.LANCZOS, reducing_gap=reducing_gap)
+
+
+@dataclass
+class IngestResult:
+    """
+    Everything derived from one decode of an upload. The encoded files live
+    in the spool directory until they are streamed into storage; call
+    cleanup() once done with them.
     """
-    Compress and resize a JPG image before saving.
-    
+    path: str
+    file_size: int
+    width: int
+    height: int
+    renditions: list = field(default_factory=list)  # [(width, height, spooled path)]
+    blurhash: str = ''
+    color: str = ''
+
+    def cleanup(self):
+        for path in [self.path] + [r[2] for r in self.renditions]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def spool_jpeg(img, spool_dir=None, **save_kwargs):
+    """Encode ``img`` straight into a temp file; returns (path, byte size)"""
+    with tempfile.NamedTemporaryFile(
+        dir=spool_dir, prefix='ingest-', suffix='.jpg', delete=False
+    ) as f:
+        try:
+            img.save(f, format='JPEG', **save_kwargs)
+        except Exception:
+            f.close()
+            os.remove(f.name)
+            raise
+        return f.name, f.tell()
+
+
+def decode_fitted(source, max_width, max_height):
+    """
+    Decode ``source`` upright (EXIF orientation applied), in RGB or L, and
+    downscaled to fit max_width x max_height. The resize engine shared by
+    ingest and the on-demand resize endpoint.
+    """
+    # Only the header is read at this point
+    img = Image.open(source)
+
+    # Sizes are computed for the upright image; draft() works on the stored one
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    rotated = orientation in (5, 6, 7, 8)
+    upright_size = img.size[::-1] if rotated else img.size
+    target_size = fit_size(upright_size, max_width, max_height)
+
+    # Let the JPEG decoder downscale by a power of two while decoding
+    if target_size != upright_size:
+        prepare_draft(img, target_size[::-1] if rotated else target_size)
+
+    # Decodes the pixels and applies the orientation tag
+    img = ImageOps.exif_transpose(img)
+
+    # Convert to RGB if necessary (handles PNG with transparency, CMYK, etc.)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    return resize_image(img, target_size)
+
+
+def ingest_image(source, quality=85, max_width=1920, max_height=1920,
+                 widths=RENDITION_WIDTHS, rendition_quality=82, spool_dir=None):
+    """
+    Decode an upload exactly once and derive everything stored for it: the
+    compressed main JPEG, its real byte size and dimensions (after the EXIF
+    orientation fix-up), the encoded renditions and the placeholders
+    (BlurHash, dominant colour).
+
+    Encoded output goes to temp files in ``spool_dir`` rather than memory,
+    and nothing touches Django storage or the database, so it can run in a
+    ProcessPoolExecutor child.
+
     Args:
-        image: The uploaded image file
-        quality: JPEG quality (1-100, default 85)
-        max_width: Maximum width in pixels (default 1920)
-        max_height: Maximum height in pixels (default 1920)
-    
+        source: Local file path or a file-like object
+    """
+    img = decode_fitted(source, max_width, max_height)
+    placeholder, color = image_placeholders(img)
+
+    path, file_size = spool_jpeg(img, spool_dir, quality=quality, optimize=True)
+    try:
+        # Renditions are downscaled from the bitmap already in memory
+        renditions = encode_renditions(img, widths, rendition_quality, spool_dir)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return IngestResult(
+        path=path,
+        file_size=file_size,
+        width=img.width,
+        height=img.height,
+        renditions=renditions,
+        blurhash=placeholder,
+        color=color,
+    )
+
+
+def rendition_name(name, width):
+    """albums/x/photos/0007.jpg -> albums/x/photos/0007_320w.jpg"""
+    root, _ = os.path.splitext(name)
+    return f"{root}_{width}w.jpg"
+
+
+def encode_renditions(img, widths=RENDITION_WIDTHS, quality=82, spool_dir=None):
+    """
+    Encode a downscaled JPEG of ``img`` for every width smaller than it,
+    each into its own temp file in ``spool_dir``.
+
     Returns:
-        InMemoryUploadedFile: Compressed image ready for saving
+        list: [(width, height, spooled path), ...], largest first
     """
-    # Open the image
-    img = Image.open(image)
-    
-    # Convert to RGB if necessary (handles PNG with transparency, etc.)
-    if img.mode in ('RGBA', 'LA', 'P'):
+    if img.mode not in ('RGB', 'L'):
         img = img.convert('RGB')
-    
-    # Get original dimensions
+
     width, height = img.size
-    
-    # Calculate new dimensions maintaining aspect ratio
-    if width > max_width or height > max_height:
-        ratio = min(max_width / width, max_height / height)
-        new_width = int(width * ratio)
-        new_height = int(height * ratio)
-        img = img.resize((new_width, new_height), Image.LANCZOS)
-    
-    # Save to BytesIO object
-    output = BytesIO()
-    img.save(output, format='JPEG', quality=quality, optimize=True)
-    output.seek(0)
-    
-    # Create InMemoryUploadedFile
-    compressed_image = InMemoryUploadedFile(
-        output,
-        'ImageField',
-        f"{image.name.split('.')[0]}.jpg",
-        'image/jpeg',
-        sys.getsizeof(output),
-        None
+    encoded = []
+    try:
+        # Largest first, so every step downsamples the previous (smaller) bitmap
+        for target in sorted(widths, reverse=True):
+            if target >= width:
+                continue
+            target_height = max(1, round(height * target / width))
+            img = resize_image(img, (target, target_height))
+
+            path, _ = spool_jpeg(img, spool_dir, quality=quality, optimize=True, progressive=True)
+            encoded.append((target, target_height, path))
+    except Exception:
+        for _, _, path in encoded:
+            os.remove(path)
+        raise
+
+    return encoded
+
+
+def store_renditions(storage, name, size, encoded):
+    """
+    Stream spooled renditions into storage next to the stored original
+    ``name``, removing the temp files as they go.
+
+    The original itself is listed under its own width so it can be used as
+    the largest srcset candidate.
+
+    Returns:
+        dict: {"<width>": {"name": str, "width": int, "height": int}}
+    """
+    width, height = size
+    renditions = {
+        str(width): {"name": name, "width": width, "height": height},
+    }
+    for target, target_height, path in encoded:
+        rendition = rendition_name(name, target)
+        # Renditions of a content-addressed blob are written once and shared
+        if storage.exists(rendition) and not is_blob(rendition):
+            storage.delete(rendition)
+        with open(path, 'rb') as f:
+            rendition = storage.save(rendition, File(f))
+        os.remove(path)
+        renditions[str(target)] = {"name": rendition, "width": target, "height": target_height}
+    return renditions
+
+
+def generate_renditions(field_file, widths=RENDITION_WIDTHS, quality=82):
+    """Create downscaled JPEG copies of a stored image next to the original."""
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as f:
+        img = Image.open(f)
+        img.load()
+
+    return store_renditions(
+        storage, field_file.name, img.size, encode_renditions(img, widths, quality)
     )
-    
-    return compressed_image
+
+
+def limit_worker_memory(max_bytes, max_pixels):
+    """
+    ProcessPoolExecutor initializer: cap the address space of an image child
+    so one pathological upload gets a MemoryError instead of the OOM killer
+    taking the whole container, and refuse decompression bombs early.
+    """
+    if max_pixels:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+    if max_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, max_bytes))
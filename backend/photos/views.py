@@ -1,10 +1,34 @@
+import os
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db import transaction
-from .models import Category, Album, Photo
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import serve
+from django.db.models import Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
+from . import fast_serializers as fast
+from .caching import CachedResponseMixin
+from .models import MAX_IMAGE_SIZE, Category, Album, Photo, UploadSession
+from .ordering import move_photo, reorder_photos
+from .pagination import AlbumCursorPagination, PhotoCursorPagination
+from .renderers import FastJSONRenderer
+from .resizing import serve_resized
+from . import resumable
+from .resumable import UploadError
+from .services import upload_photos
+from .storage import BLOB_PREFIX
 from .serializers import (
     CategorySerializer,
     AlbumListSerializer,
@@ -12,26 +36,92 @@ from .serializers import (
     PhotoSerializer,
     PhotoUploadSerializer,
     PhotoReorderSerializer,
+    PhotoMoveSerializer,
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+def public_photos(album):
+    """
+    An album's photos in display order, without those still being processed:
+    until the worker is done, a photo's file is the raw upload, EXIF/GPS included
+    """
+    return album.photos.filter(
+        processing_status=Photo.ProcessingStatus.READY
+    ).order_by(*PhotoCursorPagination.ordering)
+
+
+def latest(summary):
+    """Most recent of the album / category updated_at in an aggregate summary"""
+    return max(filter(None, [summary['modified'], summary['category_modified']]), default=None)
+
+
+class CategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    renderer_classes = [FastJSONRenderer]
     pagination_class = None
     lookup_field = 'slug'
 
+    def list(self, request, *args, **kwargs):
+        rows = self.get_queryset().values(*fast.CATEGORY_FIELDS)
+        return Response(fast.category_rows(rows, fast.MediaURLs(request)))
+
+    def last_modified(self, request, **kwargs):
+        summary = Category.objects.aggregate(modified=Max('updated_at'), count=Count('id'))
+        return summary['modified'], summary['count']
+
 
-class AlbumViewSet(viewsets.ReadOnlyModelViewSet):
+class AlbumViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     lookup_field = 'slug'
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = AlbumCursorPagination
+    cache_params = ('category', 'all', 'cursor', 'page_size')
+
+    def cache_scopes(self, request, **kwargs):
+        if kwargs.get('slug'):
+            return [f"album:{kwargs['slug']}"]
+        category = request.GET.get('category')
+        if category:
+            return [f"category:{category}"]
+        return ['catalogue']
+
+    def last_modified(self, request, **kwargs):
+        # Photo changes bump the album's scope tokens, which the validators
+        # include: no join to photos here
+        queryset = Album.objects.filter(is_published=True)
+        if kwargs.get('slug'):
+            queryset = queryset.filter(slug=kwargs['slug'])
+        else:
+            category = request.GET.get('category')
+            if category:
+                queryset = queryset.filter(category__slug=category)
+        summary = queryset.aggregate(
+            modified=Max('updated_at'),
+            category_modified=Max('category__updated_at'),
+            count=Count('id'),
+        )
+        if kwargs.get('slug') and summary['modified'] is None:
+            return None
+        return latest(summary), summary['count']
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        media = fast.MediaURLs(request)
+
+        # Legacy clients: ?all=1 returns the whole (unpaginated) list as before
+        if request.query_params.get('all') in ('1', 'true'):
+            rows = queryset.order_by(*AlbumCursorPagination.ordering).values(*fast.ALBUM_LIST_FIELDS)
+            return Response(fast.album_list_rows(rows, media))
+
+        page = self.paginate_queryset(queryset.values(*fast.ALBUM_LIST_FIELDS))
+        return self.get_paginated_response(fast.album_list_rows(page, media))
     
     def get_queryset(self):
-        queryset = Album.objects.filter(is_published=True).select_related('category')
+        queryset = (
+            Album.objects.filter(is_published=True)
+            .select_related('category')
+            .annotate(photo_count=Count('photos', filter=Q(photos__processing_status=Photo.ProcessingStatus.READY)))
+        )
 
         # Filter by category slug
         category = self.request.query_params.get('category')
@@ -45,25 +135,107 @@ class AlbumViewSet(viewsets.ReadOnlyModelViewSet):
             return AlbumDetailSerializer
         return AlbumListSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Album with only the first window of photos; `photos_next` continues
+        the stream on the photos action. ?all=1 embeds every photo as before.
+        """
+        album = self.get_object()
+        photos = public_photos(album).values(*fast.PHOTO_FIELDS)
+
+        if request.query_params.get('all') in ('1', 'true'):
+            window, photos_next = photos, None
+        else:
+            paginator = PhotoCursorPagination()
+            window = paginator.paginate_queryset(photos, request, view=self)
+            # The cursor continues on /albums/<slug>/photos/, not on this URL
+            paginator.base_url = request.build_absolute_uri(
+                self.reverse_action('photos', kwargs={'slug': album.slug})
+            )
+            page_size = request.query_params.get(paginator.page_size_query_param)
+            if page_size:
+                paginator.base_url = replace_query_param(
+                    paginator.base_url, paginator.page_size_query_param, page_size
+                )
+            photos_next = paginator.get_next_link()
+
+        return Response(fast.album_detail(album, window, photos_next, fast.MediaURLs(request)))
+
     @action(detail=True, methods=['get'])
     def photos(self, request, slug=None):
-        """Get all photos for an album in order"""
+        """Photos of an album in order, a cursor page at a time (?all=1 for every photo)"""
         album = self.get_object()
-        photos = album.photos.all().order_by('order')
-        serializer = PhotoSerializer(photos, many=True, context={'request': request})
-        return Response(serializer.data)
+        photos = public_photos(album).values(*fast.PHOTO_FIELDS)
+        media = fast.MediaURLs(request)
+
+        if request.query_params.get('all') in ('1', 'true'):
+            return Response(fast.photo_rows(photos, media))
+
+        paginator = PhotoCursorPagination()
+        page = paginator.paginate_queryset(photos, request, view=self)
+        return paginator.get_paginated_response(fast.photo_rows(page, media))
+
+
+class HomeViewSet(CachedResponseMixin, viewsets.ViewSet):
+    """
+    First albums of every category (in display order), keyed by category slug:
+    {"nunta": [...], "botez": [...]}. ``?limit=`` sets albums per category.
+    """
+    DEFAULT_LIMIT = 3
+    MAX_LIMIT = 12
+    renderer_classes = [FastJSONRenderer]
+    cache_params = ('limit',)
+
+    def last_modified(self, request, **kwargs):
+        summary = Album.objects.filter(is_published=True).aggregate(
+            modified=Max('updated_at'),
+            category_modified=Max('category__updated_at'),
+            count=Count('id'),
+        )
+        return latest(summary), summary['count']
+
+    def list(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        limit = min(max(limit, 1), self.MAX_LIMIT)
+
+        # One windowed query: number each category's albums in display order
+        # and keep the first `limit` of every partition
+        albums = (
+            Album.objects.filter(is_published=True)
+            .annotate(rank=Window(
+                RowNumber(),
+                partition_by=F('category_id'),
+                order_by=[F('order').asc(), F('date').desc()],
+            ))
+            .filter(rank__lte=limit)
+            .order_by('category__name', 'rank')
+            .values('category__slug', *fast.HOME_ALBUM_FIELDS)
+        )
+
+        data = {}
+        for row, item in zip(albums, fast.home_album_rows(albums, fast.MediaURLs(request))):
+            data.setdefault(row['category__slug'], []).append(item)
+        return Response(data)
 
 
 class PhotoViewSet(viewsets.ModelViewSet):
     serializer_class = PhotoSerializer
+    pagination_class = PhotoCursorPagination
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     def get_queryset(self):
         album_slug = self.kwargs.get('album_slug')
         if album_slug:
-            return Photo.objects.filter(
+            queryset = Photo.objects.filter(
                 album__slug=album_slug
             ).order_by('order')
+            # Anonymous readers only see processed photos (see public_photos)
+            if not self.request.user.is_authenticated:
+                queryset = queryset.filter(processing_status=Photo.ProcessingStatus.READY)
+            return queryset
         
         return Photo.objects.none()
 
@@ -71,9 +243,14 @@ class PhotoViewSet(viewsets.ModelViewSet):
         album_slug = self.kwargs.get('album_slug')
         album = get_object_or_404(Album, slug=album_slug)
 
-        # Set order to last position
-        last_order = album.photos.count()
-        serializer.save(album=album, order=last_order)
+        # Appended at the end of the album; a client-sent order is ignored
+        fields = dict(serializer.validated_data)
+        fields.pop('order', None)
+        image = fields.pop('image')
+        try:
+            serializer.instance = upload_photos(album, [image], **fields)[0]
+        except DjangoValidationError as e:
+            raise ValidationError({'image': e.messages})
 
     @action(detail=False, methods=['post'], url_path='reorder')
     def reorder(self, request, album_slug=None):
@@ -86,21 +263,30 @@ class PhotoViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         photos_data = serializer.validated_data['photos']
+        album = get_object_or_404(Album, slug=album_slug)
 
-        try:
-            with transaction.atomic():
-                for photo_data in photos_data:
-                    Photo.objects.filter(
-                        id=photo_data['id'],
-                        album__slug=album_slug
-                    ).update(order=photo_data['order'])
-
-            return Response({'message': 'Photos reordered successfully'})
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Only the sequence matters: photos are renumbered with gaps in one UPDATE
+        ranked = sorted(photos_data, key=lambda item: item.get('order', 0))
+        reorder_photos(album.pk, [item['id'] for item in ranked if 'id' in item])
+        return Response({'message': 'Photos reordered successfully'})
+
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, album_slug=None, pk=None):
+        """
+        Move one photo before another: {"before": <photo id>}, or to the end
+        of the album with {"before": null}. Rewrites a single row.
+        """
+        photo = self.get_object()
+        serializer = PhotoMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        before = None
+        before_id = serializer.validated_data.get('before')
+        if before_id is not None:
+            before = get_object_or_404(Photo, pk=before_id, album_id=photo.album_id)
+
+        move_photo(photo, before=before)
+        return Response({'id': photo.pk, 'order': photo.order})
 
     @action(detail=False, methods=['post'], url_path='bulk-upload')
     def bulk_upload(self, request, album_slug=None):
@@ -114,21 +300,136 @@ class PhotoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        created_photos = []
-        start_order = album.photos.count()
-
-        with transaction.atomic():
-            for i, file in enumerate(files):
-                photo = Photo.objects.create(
-                    album=album,
-                    image=file,
-                    order=start_order + i
-                )
-                created_photos.append(photo)
+        try:
+            created_photos = upload_photos(album, files)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = PhotoSerializer(
             created_photos,
             many=True,
             context={'request': request}
         )
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def serve_blob(request, path):
+    """
+    Content-addressed media (photos.storage) on the development server: a
+    blob URL never changes content, so it may be cached for a year without
+    revalidation. In production the front server serves media/.
+    """
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, BLOB_PREFIX))
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_BLOB_MAX_AGE, immutable=True)
+    return response
+
+
+def resized_media(request, width, height, path):
+    """Stored image scaled to fit one of the whitelisted RESIZE_SIZES"""
+    if (width, height) not in settings.RESIZE_SIZES:
+        raise Http404("Size not available")
+    return serve_resized(request, path, (width, height))
+
+
+class ResumableUploadMixin:
+    """
+    Shared by the resumable upload views (photos.resumable): the tus headers,
+    and protocol / validation errors answered as {"error": ...}.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        version = request.headers.get('Tus-Resumable')
+        if request.method != 'OPTIONS' and version and version != resumable.TUS_VERSION:
+            raise UploadError(412, f'Only tus {resumable.TUS_VERSION} is supported')
+
+    def handle_exception(self, exc):
+        if isinstance(exc, UploadError):
+            response = Response({'error': exc.message}, status=exc.status)
+            if exc.status == 460:
+                response.reason_phrase = 'Checksum Mismatch'
+            return response
+        if isinstance(exc, DjangoValidationError):
+            return Response({'error': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        response['Tus-Resumable'] = resumable.TUS_VERSION
+        return response
+
+    def options(self, request, *args, **kwargs):
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response['Tus-Version'] = resumable.TUS_VERSION
+        response['Tus-Extension'] = resumable.TUS_EXTENSIONS
+        response['Tus-Max-Size'] = MAX_IMAGE_SIZE
+        response['Tus-Checksum-Algorithm'] = ','.join(resumable.CHECKSUM_ALGORITHMS)
+        return response
+
+    def upload_headers(self, response, session):
+        response['Upload-Offset'] = session.offset
+        response['Upload-Length'] = session.length
+        response['Upload-Expires'] = http_date(session.expires_at.timestamp())
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class AlbumUploadsView(ResumableUploadMixin, APIView):
+    """Start a resumable upload into an album (tus creation)"""
+
+    def post(self, request, album_slug):
+        album = get_object_or_404(Album, slug=album_slug)
+        try:
+            length = int(request.headers['Upload-Length'])
+        except (KeyError, ValueError):
+            raise UploadError(400, 'Upload-Length is required')
+        if length <= 0:
+            raise UploadError(400, 'Upload-Length must be positive')
+
+        metadata = resumable.parse_metadata(request.headers.get('Upload-Metadata'))
+        session = resumable.create_session(album, length, metadata)
+
+        response = Response(status=status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(reverse('upload-detail', args=[session.pk]))
+        return self.upload_headers(response, session)
+
+
+class UploadView(ResumableUploadMixin, APIView):
+    """Offset (HEAD), next chunk (PATCH) or abandon (DELETE) of one resumable upload"""
+
+    def get_session(self, pk):
+        session = get_object_or_404(UploadSession.objects.select_related('album'), pk=pk)
+        if not session.is_complete and session.expires_at < timezone.now():
+            raise UploadError(410, 'Upload expired')
+        return session
+
+    def head(self, request, pk):
+        session = self.get_session(pk)
+        return self.upload_headers(Response(status=status.HTTP_200_OK), session)
+
+    def patch(self, request, pk):
+        session = self.get_session(pk)
+        if request.content_type.split(';')[0].strip() != 'application/offset+octet-stream':
+            raise UploadError(415, 'Content-Type must be application/offset+octet-stream')
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise UploadError(400, 'Upload-Offset is required')
+        try:
+            content_length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            raise UploadError(411, 'Content-Length is required')
+
+        # The body is streamed to the staging file, never read into memory
+        resumable.append_chunk(
+            session, offset, request.stream, content_length,
+            checksum=request.headers.get('Upload-Checksum'),
+        )
+        return self.upload_headers(Response(status=status.HTTP_204_NO_CONTENT), session)
+
+    def delete(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk)
+        # A completed upload's photo stays; only the session goes
+        resumable.discard(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
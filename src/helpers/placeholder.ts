@@ -0,0 +1,98 @@
+import type { CSSProperties } from "react";
+
+// BlurHash decoder (https://blurha.sh) for the placeholders the API sends with
+// every image: painted into a tiny canvas and shown as the tile background
+// until the real image has loaded.
+
+const BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~";
+const SIZE = 32;
+const cache = new Map<string, string>();
+
+const decode83 = (str: string): number => {
+  let value = 0;
+  for (const c of str) value = value * 83 + BASE83.indexOf(c);
+  return value;
+};
+
+const srgbToLinear = (value: number): number => {
+  const v = value / 255;
+  return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+};
+
+const linearToSrgb = (value: number): number => {
+  const v = Math.max(0, Math.min(1, value));
+  return v <= 0.0031308 ? Math.round(v * 12.92 * 255) : Math.round((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255);
+};
+
+const signPow = (value: number, exp: number): number => Math.sign(value) * Math.pow(Math.abs(value), exp);
+
+const decodeBlurhash = (hash: string, width: number, height: number): Uint8ClampedArray => {
+  const sizeFlag = decode83(hash[0]);
+  const numX = (sizeFlag % 9) + 1;
+  const numY = Math.floor(sizeFlag / 9) + 1;
+  const maxValue = (decode83(hash[1]) + 1) / 166;
+
+  const colors: number[][] = [];
+  for (let i = 0; i < numX * numY; i++) {
+    if (i === 0) {
+      const value = decode83(hash.substring(2, 6));
+      colors.push([srgbToLinear(value >> 16), srgbToLinear((value >> 8) & 255), srgbToLinear(value & 255)]);
+    } else {
+      const value = decode83(hash.substring(4 + i * 2, 6 + i * 2));
+      colors.push([
+        signPow((Math.floor(value / (19 * 19)) - 9) / 9, 2) * maxValue,
+        signPow(((Math.floor(value / 19) % 19) - 9) / 9, 2) * maxValue,
+        signPow(((value % 19) - 9) / 9, 2) * maxValue,
+      ]);
+    }
+  }
+
+  const pixels = new Uint8ClampedArray(width * height * 4);
+  for (let y = 0; y < height; y++) {
+    for (let x = 0; x < width; x++) {
+      let r = 0, g = 0, b = 0;
+      for (let j = 0; j < numY; j++) {
+        for (let i = 0; i < numX; i++) {
+          const basis = Math.cos((Math.PI * x * i) / width) * Math.cos((Math.PI * y * j) / height);
+          const color = colors[i + j * numX];
+          r += color[0] * basis;
+          g += color[1] * basis;
+          b += color[2] * basis;
+        }
+      }
+      const p = 4 * (x + y * width);
+      pixels[p] = linearToSrgb(r);
+      pixels[p + 1] = linearToSrgb(g);
+      pixels[p + 2] = linearToSrgb(b);
+      pixels[p + 3] = 255;
+    }
+  }
+  return pixels;
+};
+
+const blurhashDataUrl = (hash: string): string | undefined => {
+  if (cache.has(hash)) return cache.get(hash);
+  if (hash.length < 6 || typeof document === "undefined") return undefined;
+
+  const canvas = document.createElement("canvas");
+  canvas.width = SIZE;
+  canvas.height = SIZE;
+  const ctx = canvas.getContext("2d");
+  if (!ctx) return undefined;
+  ctx.putImageData(new ImageData(decodeBlurhash(hash, SIZE, SIZE), SIZE, SIZE), 0, 0);
+
+  const url = canvas.toDataURL();
+  cache.set(hash, url);
+  return url;
+};
+
+// Background for an image tile: dominant colour at once, the blurred preview on top
+export const placeholderStyle = (blurhash?: string, color?: string): CSSProperties => {
+  const preview = blurhash ? blurhashDataUrl(blurhash) : undefined;
+  return {
+    backgroundColor: color || undefined,
+    backgroundImage: preview ? `url(${preview})` : undefined,
+    backgroundSize: "cover",
+    backgroundPosition: "center",
+  };
+};
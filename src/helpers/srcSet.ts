@@ -0,0 +1,12 @@
+import type { Renditions } from "../services/api";
+
+export const buildSrcSet = (renditions: Renditions | undefined): string | undefined => {
+  if (!renditions) return undefined;
+  const entries = Object.values(renditions);
+  if (entries.length === 0) return undefined;
+
+  return entries
+    .sort((a, b) => a.width - b.width)
+    .map((r) => `${r.url} ${r.width}w`)
+    .join(", ");
+};
@@ -0,0 +1,23 @@
+import { useInfiniteQuery } from "@tanstack/react-query";
+import { getPhotoPage, type Album } from "../services/api";
+
+// Photos after the first window embedded in the album detail, page by page
+export const useAlbumPhotosQuery = (album: Album | undefined) => {
+  const query = useInfiniteQuery({
+    queryKey: ["album-photos", album?.slug, album?.photos_next],
+    queryFn: ({ pageParam }) => getPhotoPage(pageParam!),
+    initialPageParam: album?.photos_next ?? null,
+    getNextPageParam: (lastPage) => lastPage.next,
+    enabled: !!album?.photos_next,
+  });
+
+  return {
+    photos: [
+      ...(album?.photos ?? []),
+      ...(query.data?.pages.flatMap((page) => page.results) ?? []),
+    ],
+    hasMore: query.hasNextPage,
+    isFetching: query.isFetching,
+    loadMore: query.fetchNextPage,
+  };
+};
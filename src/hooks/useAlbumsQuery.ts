@@ -1,10 +1,12 @@
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import { getAlbums } from "../services/api";
 
 export const useAlbumsQuery = (categorySlug?: string) => {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ["albums", categorySlug],
-    queryFn: () => getAlbums(categorySlug), 
+    queryFn: ({ pageParam }) => getAlbums(categorySlug, pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next,
     enabled: !!categorySlug,
   });
-};
\ No newline at end of file
+};
@@ -1,6 +1,10 @@
+import { useEffect, useRef } from "react";
 import { useParams, Link } from "react-router-dom";
 import Tilt from "react-parallax-tilt";
 import { useAlbumsQuery } from "../hooks/useAlbumsQuery";
+import { useCategoriesQuery } from "../hooks/useCategoriesQuery";
+import { buildSrcSet } from "../helpers/srcSet";
+import { placeholderStyle } from "../helpers/placeholder";
 
 const categoryMeta: Record<
   string,
@@ -34,11 +38,30 @@ const categoryMeta: Record<
 
 const AlbumCatalogue = () => {
   const { albumCategory } = useParams<{ albumCategory: string }>();
-  const { data, isLoading, isError, error } = useAlbumsQuery(albumCategory);
+  const { data, isLoading, isError, error, hasNextPage, isFetchingNextPage, fetchNextPage } =
+    useAlbumsQuery(albumCategory);
+  const { data: categories } = useCategoriesQuery();
+  const sentinelRef = useRef<HTMLDivElement>(null);
 
   const meta = albumCategory ? categoryMeta[albumCategory] : null;
-  const albums = data || [];
-  
+  const albums = data?.pages.flatMap((page) => page.results) ?? [];
+  const totalAlbums =
+    categories?.find((c) => c.slug === albumCategory)?.published_album_count ?? albums.length;
+
+  // Infinite scroll: load the next page when the sentinel under the grid comes into view
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !hasNextPage) return;
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting && !isFetchingNextPage) fetchNextPage();
+      },
+      { rootMargin: "600px" },
+    );
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [hasNextPage, isFetchingNextPage, fetchNextPage]);
+
   if (!meta) {
     return (
       <div className="flex flex-col items-center justify-center min-h-screen px-6 text-center">
@@ -111,7 +134,7 @@ const AlbumCatalogue = () => {
       <div className="sticky top-0 z-20 bg-white border-b border-gray-100 shadow-sm">
         <div className="flex items-center justify-between max-w-6xl px-4 py-3 mx-auto">
           <p className="text-xs tracking-widest text-gray-400 uppercase">
-            {albums.length} {albums.length === 1 ? "Album" : "Albume"}
+            {totalAlbums} {totalAlbums === 1 ? "Album" : "Albume"}
           </p>
           <p className="text-xs text-gray-400">Tap pentru a deschide albumul</p>
         </div>
@@ -145,9 +168,9 @@ const AlbumCatalogue = () => {
                 scale={1.02}
                 gyroscope={true}
                 className="relative aspect-3/4 rounded-2xl overflow-hidden shadow-md group-hover:shadow-xl transition-shadow duration-500"
-                style={{ transformStyle: "preserve-3d" }}
+                style={{ transformStyle: "preserve-3d", ...placeholderStyle(album.cover_blurhash, album.cover_color) }}
               >
-                <img src={album.cover_url || "/dummy_cover.jpg"} alt={album.name} className="absolute inset-0 object-cover w-full h-full" />
+                <img src={album.cover_url || "/dummy_cover.jpg"} srcSet={buildSrcSet(album.cover_renditions)} sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw" alt={album.name} className="absolute inset-0 object-cover w-full h-full" />
                 <div className="absolute inset-0 bg-linear-to-t from-black/70 via-black/20 to-transparent" />
                 <div className="absolute bottom-0 left-0 right-0 p-5">
                   <h3 className="mb-1 text-lg font-semibold tracking-wide text-white group-hover:underline underline-offset-4">{album.name}</h3>
@@ -179,6 +202,13 @@ const AlbumCatalogue = () => {
           ))}
         </div>
       )}
+
+      {/* Next page loads when this scrolls into view */}
+      <div ref={sentinelRef} className="flex justify-center pb-12">
+        {isFetchingNextPage && (
+          <div className="w-8 h-8 border-4 rounded-full animate-spin" style={{ borderColor: "#6F8584 transparent transparent transparent" }} />
+        )}
+      </div>
     </div>
   );
 };
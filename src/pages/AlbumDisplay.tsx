@@ -1,15 +1,34 @@
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import Tilt from "react-parallax-tilt";
 import Lightbox from "yet-another-react-lightbox";
 import "yet-another-react-lightbox/styles.css";
 import { useAlbumQuery } from "../hooks/useAlbumQuery";
+import { useAlbumPhotosQuery } from "../hooks/useAlbumPhotosQuery";
+import { buildSrcSet } from "../helpers/srcSet";
+import { placeholderStyle } from "../helpers/placeholder";
 
 const AlbumDisplay = () => {
   const { albumCategory, albumId } = useParams<{ albumCategory: string; albumId: string }>();
   const [selectedPhoto, setSelectedPhoto] = useState<number>(-1);
 
   const { data: album, isLoading: albumLoading, error } = useAlbumQuery(albumId);
+  const { photos, hasMore, isFetching, loadMore } = useAlbumPhotosQuery(album);
+  const sentinelRef = useRef<HTMLDivElement>(null);
+
+  // Progressive loading: fetch the next window before the grid runs out
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !hasMore) return;
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting && !isFetching) loadMore();
+      },
+      { rootMargin: "1200px" },
+    );
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [hasMore, isFetching, loadMore]);
 
   if (albumLoading) {
     return (
@@ -55,7 +74,7 @@ const AlbumDisplay = () => {
           )}
           <div className="h-px mx-auto mt-5 w-12" style={{ backgroundColor: "rgba(255,255,255,0.5)" }} />
           <p className="mt-4 text-xs tracking-widest uppercase text-white/60">
-            {album.photos.length} {album.photos.length === 1 ? "Fotografie" : "Fotografii"}
+            {album.photo_count} {album.photo_count === 1 ? "Fotografie" : "Fotografii"}
           </p>
         </div>
       </div>
@@ -63,7 +82,7 @@ const AlbumDisplay = () => {
       {/* Grid */}
       <div className="container px-4 py-12 mx-auto md:py-16">
         <div className="grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
-          {album.photos.map((photo, i) => (
+          {photos.map((photo, i) => (
             <div key={photo.id} onClick={() => setSelectedPhoto(i)} className="cursor-pointer group" data-aos="zoom-in" data-aos-delay={`${Math.min(i * 50, 600)}`}>
               <Tilt
                 tiltAxis="y"
@@ -75,9 +94,9 @@ const AlbumDisplay = () => {
                 scale={1.03}
                 gyroscope={true}
                 className="relative overflow-hidden shadow-lg aspect-3/4 rounded-xl group-hover:shadow-2xl transition-all duration-300"
-                style={{ transformStyle: "preserve-3d" }}
+                style={{ transformStyle: "preserve-3d", ...placeholderStyle(photo.blurhash, photo.color) }}
               >
-                <img src={photo.image_url} alt={photo.alt_text || `${album.name} - Photo ${i + 1}`} className="absolute inset-0 object-cover w-full h-full" loading="lazy" />
+                <img src={photo.image_url} srcSet={buildSrcSet(photo.renditions)} sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw" alt={photo.alt_text || `${album.name} - Photo ${i + 1}`} className="absolute inset-0 object-cover w-full h-full" loading="lazy" />
                 <div className="absolute inset-0 transition-opacity duration-300 opacity-0 bg-linear-to-t from-black/60 via-transparent to-transparent group-hover:opacity-100" />
                 <div className="absolute inset-0 flex items-center justify-center transition-all duration-300 transform opacity-0 scale-75 group-hover:opacity-100 group-hover:scale-100">
                   <div className="p-4 shadow-xl bg-white/90 backdrop-blur-sm rounded-full">
@@ -97,6 +116,11 @@ const AlbumDisplay = () => {
             </div>
           ))}
         </div>
+        <div ref={sentinelRef} className="flex justify-center pt-8">
+          {hasMore && isFetching && (
+            <div className="w-8 h-8 border-4 rounded-full animate-spin" style={{ borderColor: "#6F8584 transparent transparent transparent" }} />
+          )}
+        </div>
       </div>
 
       {/* CTA */}
@@ -116,9 +140,22 @@ const AlbumDisplay = () => {
         open={selectedPhoto !== -1}
         index={selectedPhoto}
         close={() => setSelectedPhoto(-1)}
-        slides={album.photos.map((p) => ({
+        on={{
+          // Keep slides ahead of the viewer when browsing past the loaded windows
+          view: ({ index }) => {
+            if (hasMore && !isFetching && index >= photos.length - 3) loadMore();
+          },
+        }}
+        slides={photos.map((p) => ({
           src: p.image_url,
           alt: p.alt_text,
+          width: p.width ?? undefined,
+          height: p.height ?? undefined,
+          srcSet: Object.values(p.renditions ?? {}).map((r) => ({
+            src: r.url,
+            width: r.width,
+            height: r.height,
+          })),
         }))}
       />
     </div>
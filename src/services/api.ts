@@ -1,5 +1,13 @@
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8080/api";
 
+export interface Rendition {
+  url: string;
+  width: number;
+  height: number;
+}
+
+export type Renditions = Record<string, Rendition>;
+
 export interface CategoryCover {
   id: number;
   image: string;
@@ -17,6 +25,9 @@ export interface Category {
   is_active: boolean;
   published_album_count: number;
   cover_url: string | null;
+  cover_renditions: Renditions;
+  cover_blurhash: string;
+  cover_color: string;
   covers: CategoryCover[]; // ✅ Added
 }
 
@@ -30,34 +41,73 @@ export interface Album {
   location: string;
   description: string;
   cover_url: string | null;
+  cover_renditions: Renditions;
+  // Placeholder shown until the cover loads
+  cover_blurhash: string;
+  cover_color: string;
   photo_count: number;
   is_published: boolean;
   order: number;
   created_at: string;
+  // Album detail only: the first window of photos and the cursor URL for the rest
   photos: Array<Photo>
+  photos_next: string | null;
 }
 
 export interface Photo {
   id: number;
   image: string;
   image_url: string;
+  renditions: Renditions;
   caption: string;
   alt_text: string;
   is_featured: boolean;
   order: number;
   width: number | null;
   height: number | null;
+  // Placeholder shown until the image loads
+  blurhash: string;
+  color: string;
   file_size: number | null;
   uploaded_at: string;
 }
 
+export interface CursorPage<T> {
+  next: string | null;
+  results: T[];
+}
+
+// One page of albums; pass the previous page's `next` URL to continue
 export const getAlbums = async (
   categorySlug?: string,
-): Promise<Album[]> => { 
+  nextUrl?: string | null,
+): Promise<CursorPage<Album>> => {
   const params = new URLSearchParams();
   if (categorySlug) params.append("category", categorySlug);
 
-  const response = await fetch(`${API_URL}/albums/?${params}`);
+  const response = await fetch(nextUrl || `${API_URL}/albums/?${params}`);
+  if (!response.ok) throw new Error("Failed to fetch albums");
+  return response.json();
+};
+
+export type HomeAlbum = Pick<
+  Album,
+  | "id"
+  | "name"
+  | "slug"
+  | "date"
+  | "cover_url"
+  | "cover_renditions"
+  | "cover_blurhash"
+  | "cover_color"
+  | "created_at"
+>;
+
+// First `limit` albums of every category, keyed by category slug
+export const getHomeAlbums = async (
+  limit = 3,
+): Promise<Record<string, HomeAlbum[]>> => {
+  const response = await fetch(`${API_URL}/home/?limit=${limit}`);
   if (!response.ok) throw new Error("Failed to fetch albums");
   return response.json();
 };
@@ -68,6 +118,13 @@ export const getAlbum = async (slug: string): Promise<Album> => {
   return response.json();
 };
 
+// Next window of an album's photos, from `photos_next` / a previous page's `next`
+export const getPhotoPage = async (url: string): Promise<CursorPage<Photo>> => {
+  const response = await fetch(url);
+  if (!response.ok) throw new Error("Failed to fetch photos");
+  return response.json();
+};
+
 export const getCategories = async (): Promise<Category[]> => {
   const response = await fetch(`${API_URL}/categories/`);
   if (!response.ok) throw new Error("Failed to fetch categories");